@@ -1,13 +1,27 @@
+import time
+
+# Taken before anything else is imported, so the 'import' span includes PyQt6
+STARTED = time.perf_counter()
+
 import os
 import sys
+from src.gui import profiler
+
+profiler.begin('import', at=STARTED)
+
 import ibrowse
-from PyQt6.QtCore import QUrl, QTimer, QCoreApplication, QProcess, Qt
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QUrl, QCoreApplication, QProcess, Qt
 from PyQt6.QtWidgets import QMainWindow, QApplication, QMessageBox
+from src.gui.icons import icon
+from src.gui.instance import InstanceServer, forward
+from src.gui.lifecycle import MemoryMonitor
 from src.gui.tab import Tab
 from src.gui.tab_view import TabView
+from src.gui import watchdog
 from src.gui.web_engine import WebEngineProfile
 
+profiler.end('import')
+
 
 if getattr(sys, 'frozen', False):
     os.chdir(sys._MEIPASS)
@@ -17,15 +31,16 @@ class Ibrowse(QMainWindow):
     def __init__(self, profile=None):
         super().__init__()
         self.setWindowTitle('Ibrowse')
-        self.setWindowIcon(QIcon('resources/icons/logos/ibrowse_icon.svg'))
+        self.setWindowIcon(icon('resources/icons/logos/ibrowse_icon.svg'))
         self.resize(1000, 800)
 
         if profile:
             self._profile = profile
 
         else:
-            self._profile = WebEngineProfile('PersistentProfile', self)
-            self._profile.setCachePath(ibrowse.cache_dir())
+            with profiler.span('WebEngineProfile'):
+                self._profile = WebEngineProfile('PersistentProfile', self)
+                self._profile.setCachePath(ibrowse.cache_dir())
 
         self.createUI()
 
@@ -35,7 +50,7 @@ class Ibrowse(QMainWindow):
 
             for i in range(self.tab_view.count()):
                 tab = self.tab_view.widget(i)
-                tabs.append(tab.activeUrl().toString())
+                tabs.append((tab.activeUrl().toString(), tab.title(), tab.lastActive()))
 
             ibrowse.set_previous_tabs(tabs)
             ibrowse.set_preferred_browser(self.tab_view.currentWidget().engineCombo().currentText())
@@ -43,6 +58,8 @@ class Ibrowse(QMainWindow):
         else:
             ibrowse.set_previous_tabs([])
 
+        ibrowse.flush()
+
         super().closeEvent(event)
 
     def createUI(self):
@@ -51,13 +68,24 @@ class Ibrowse(QMainWindow):
         self.setCentralWidget(self.tab_view)
 
     def loadTabs(self):
-        if len(ibrowse.previous_tabs()) > 0:
-            for url in ibrowse.previous_tabs():
-                if not url.startswith('https'):
-                    continue
+        previous_tabs = [tab for tab in ibrowse.previous_tabs() if tab[0].startswith('https')]
+
+        if len(previous_tabs) > 0:
+            # Only the most recently used tabs load straight away, the rest wait until they are selected
+            by_recency = sorted(previous_tabs, key=lambda tab: tab[2], reverse=True)
+            eager = by_recency[:ibrowse.eager_restore_count()]
+
+            self.tab_view.blockSignals(True)
 
-                tab = Tab(self.tab_view, self._profile, url=url, parent=self)
-                self.tab_view.addTab(tab, '')
+            for url, title, last_active in previous_tabs:
+                lazy = (url, title, last_active) not in eager
+
+                with profiler.span('Tab', url=url, lazy=lazy):
+                    self.tab_view.restoreTab(url, title, last_active, lazy=lazy)
+
+            self.tab_view.blockSignals(False)
+            self.tab_view.setCurrentIndex(previous_tabs.index(by_recency[0]))
+            self.tab_view.activateTab(self.tab_view.currentIndex())
 
             return
 
@@ -72,7 +100,7 @@ class Ibrowse(QMainWindow):
     def openFromArg(self, arg: str):
         if os.path.exists(arg):
             try:
-                tab = Tab(self.tab_view, self._profile, parent=self).fromHtml(arg)
+                tab = Tab(self.tab_view, self._profile, parent=self).fromHtml(arg, cached=False)
 
                 self.tab_view.addTab(tab, 'File')
                 self.tab_view.setCurrentWidget(tab)
@@ -86,13 +114,25 @@ class Ibrowse(QMainWindow):
             self.tab_view.addTab(tab, '')
             self.tab_view.setCurrentWidget(tab)
 
+    def openFromArgs(self, args: list[str]):
+        if not args:
+            self.newWindow()
+            return
+
+        for arg in args:
+            self.openFromArg(arg)
+
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
     def newWindow(self, start_editing=True):
         window = Ibrowse(self._profile)
         window.show()
         window.loadDefaultTab()
 
         if start_editing:
-            QTimer.singleShot(300, window.tab_view.startEditing)
+            window.tab_view.startEditing()
 
         self.window = window
 
@@ -104,6 +144,12 @@ class Ibrowse(QMainWindow):
         self.window = window
 
     def restart(self):
+        ibrowse.flush()
+
+        # The new process has to become the running instance instead of forwarding to this one
+        for server in QCoreApplication.instance().findChildren(InstanceServer):
+            server.close()
+
         QCoreApplication.quit()
         QCoreApplication.processEvents()
 
@@ -115,21 +161,66 @@ class Ibrowse(QMainWindow):
 
 
 def main():
-    app = QApplication(sys.argv)
+    with profiler.span('QApplication'):
+        app = QApplication(sys.argv)
+
+    new_instance = '--new-instance' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ('--new-instance', '--profile-startup', '--watchdog')]
+
+    # Hand the arguments to an Ibrowse that is already running and leave before WebEngine starts
+    if not new_instance and forward(args):
+        return
+
+    # --new-instance runs alongside the running instance without taking over its server
+    server = InstanceServer(app)
+
+    # Another launch became the running instance in the meantime, it takes the arguments instead
+    if not new_instance and not server.start() and forward(args):
+        return
+
     app.setEffectEnabled(Qt.UIEffect.UI_AnimateCombo, False)
     app.setEffectEnabled(Qt.UIEffect.UI_AnimateTooltip, False)
-    app.setStyleSheet(ibrowse.read_html('resources/stylesheets/ibrowse_dark.css'))
 
-    window = Ibrowse()
+    with profiler.span('stylesheet'):
+        app.setStyleSheet(ibrowse.read_resource('resources/stylesheets/ibrowse_dark.css'))
+
+    app.aboutToQuit.connect(ibrowse.flush)
+
+    memory_monitor = MemoryMonitor(app)
+
+    # Startup profiling is about finding stalls too
+    if watchdog.ENABLED or profiler.ENABLED:
+        watchdog.start()
+
+    with profiler.span('window'):
+        window = Ibrowse()
+
+    if profiler.ENABLED:
+        tracker = profiler.StartupTracker(app, window)
+
     window.show()
 
     app.processEvents()
 
-    if len(sys.argv) > 1:
-            window.openFromArg(sys.argv[1])
+    if args:
+        for arg in args:
+            with profiler.span('Tab', url=arg):
+                window.openFromArg(arg)
+
     else:
         window.loadTabs()
 
+    if profiler.ENABLED:
+        tracker.track([window.tab_view.widget(i) for i in range(window.tab_view.count())])
+
+    def open_forwarded(forwarded_args: list[str]):
+        windows = [widget for widget in app.topLevelWidgets() if isinstance(widget, Ibrowse) and widget.isVisible()]
+        target = app.activeWindow() if isinstance(app.activeWindow(), Ibrowse) else windows[-1]
+
+        target.openFromArgs(forwarded_args)
+
+    server.received.connect(open_forwarded)
+
     # Crash handler
     def handle_exception(exctype, value, tb):
         QMessageBox.critical(window, 'Error:(', f'Ibrowse encountered an error:\n\n{value}\n')
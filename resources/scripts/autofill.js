@@ -0,0 +1,69 @@
+// Fills in saved logins. Installed once per profile and run in Ibrowse's own JavaScript world,
+// so pages can't see it. Credentials arrive as web channel messages, never as script source.
+(function () {
+    'use strict';
+
+    function setValue(field, value) {
+        field.value = value;
+        field.dispatchEvent(new Event('input', { bubbles: true }));
+        field.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+
+    // Every visible password field, with the text field before it as its username field
+    function loginForms() {
+        const forms = [];
+
+        for (const password of document.querySelectorAll('input[type="password"]')) {
+            if (password.getClientRects().length === 0) {
+                continue;
+            }
+
+            const fields = Array.from((password.form || document).querySelectorAll(
+                'input:not([type]), input[type="text"], input[type="email"], input[type="tel"], input[type="password"]'
+            ));
+            const username = fields.slice(0, fields.indexOf(password)).reverse().find(field => field.type !== 'password');
+
+            forms.push({ username: username, password: password });
+        }
+
+        return forms;
+    }
+
+    new QWebChannel(qt.webChannelTransport, function (channel) {
+        const autofill = channel.objects.autofill;
+        let forms = [];
+
+        function detect() {
+            forms = loginForms();
+
+            if (forms.length) {
+                autofill.loginFormFound();
+            }
+        }
+
+        // One message fills every login form on the page, fields the user already typed in are kept
+        autofill.fillLogin.connect(function (username, password) {
+            for (const form of forms) {
+                if (form.username && username && !form.username.value) {
+                    setValue(form.username, username);
+                }
+
+                if (!form.password.value) {
+                    setValue(form.password, password);
+                }
+            }
+        });
+
+        autofill.fillFocused.connect(function (value) {
+            const field = document.activeElement;
+
+            if (field && 'value' in field) {
+                setValue(field, value);
+                field.selectionStart = field.selectionEnd = value.length;
+            }
+        });
+
+        autofill.detectRequested.connect(detect);
+        detect();
+    });
+})();
@@ -0,0 +1,63 @@
+import ibrowse
+from PyQt6.QtCore import QFile, QIODevice, QObject, pyqtSignal, pyqtSlot
+from PyQt6.QtWebChannel import QWebChannel
+from PyQt6.QtWebEngineCore import QWebEnginePage, QWebEngineProfile, QWebEngineScript
+
+
+SCRIPT_NAME = 'ibrowse-autofill'
+# Ibrowse's own JavaScript world, pages can't reach the script or the channel from theirs
+WORLD_ID = QWebEngineScript.ScriptWorldId.ApplicationWorld
+
+
+def install_script(profile: QWebEngineProfile):
+    # Injected into every page by Chromium, so nothing is compiled when a password is pasted
+    if profile.scripts().find(SCRIPT_NAME):
+        return
+
+    channel_file = QFile(':/qtwebchannel/qwebchannel.js')
+    channel_file.open(QIODevice.OpenModeFlag.ReadOnly)
+    channel_source = bytes(channel_file.readAll()).decode()
+    channel_file.close()
+
+    script = QWebEngineScript()
+    script.setName(SCRIPT_NAME)
+    script.setSourceCode(channel_source + ibrowse.read_resource('resources/scripts/autofill.js'))
+    script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
+    script.setWorldId(WORLD_ID)
+    script.setRunsOnSubFrames(False)
+
+    profile.scripts().insert(script)
+
+
+# The page's end of the autofill script, credentials are sent as signal arguments
+class AutofillBridge(QObject):
+    detectRequested = pyqtSignal()
+    fillLogin = pyqtSignal(str, str)
+    fillFocused = pyqtSignal(str)
+
+    def __init__(self, page: QWebEnginePage):
+        super().__init__(page)
+
+        self.page = page
+
+        self.channel = QWebChannel(self)
+        self.channel.registerObject('autofill', self)
+        page.setWebChannel(self.channel, WORLD_ID)
+
+        # Login forms added after the document was ready are found once loading has finished
+        page.loadFinished.connect(self.detect)
+
+    def detect(self, ok: bool):
+        if ok:
+            self.detectRequested.emit()
+
+    @pyqtSlot()
+    def loginFormFound(self):
+        # Nothing was asked for, so only credentials saved for this exact scheme, host and port are filled
+        credentials = ibrowse.lookup_credentials(self.page.url().toString(), same_origin=True)
+
+        if credentials:
+            self.fillLogin.emit(*credentials)
+
+    def fill(self, value: str):
+        self.fillFocused.emit(value)
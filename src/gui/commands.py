@@ -5,4 +5,8 @@ COMMANDS = ['/exit',
             '/whatsnew',
             '/newtab',
             '/newwindow',
+            '/perf',
+            '/perfdump',
+            '/tasks',
+            '/downloads',
             ]
@@ -1,10 +1,14 @@
-import csv
 import ibrowse
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QIcon
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QWidget, QHBoxLayout, QPushButton, QLineEdit, QListWidget,
-    QListWidgetItem, QApplication, QFileDialog, QDialogButtonBox)
+from PyQt6.QtCore import Qt, QSortFilterProxyModel
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QWidget, QHBoxLayout, QPushButton, QLineEdit, QListView,
+    QApplication, QFileDialog, QDialogButtonBox)
+from src.gui.icons import icon
 from src.gui.inputs import StringInput
+from src.gui.password_list import PasswordDelegate, PasswordsModel
+
+
+# Number of CSV rows handed to the password store per transaction when importing
+IMPORT_CHUNK_SIZE = 1000
 
 
 class PasswordsDialog(QDialog):
@@ -16,10 +20,11 @@ class PasswordsDialog(QDialog):
         self.resize(500, 300)
 
         self.createUI()
-        self.createList()
 
     def showEvent(self, event):
-        self.createList()
+        # Passwords may have been saved elsewhere since the last time, only the first page is read again
+        self.model.reload()
+        self.searchPasswords(self.search_box.text())
 
         super().showEvent(event)
 
@@ -29,12 +34,12 @@ class PasswordsDialog(QDialog):
         container.setLayout(QHBoxLayout())
         container.layout().setContentsMargins(0, 0, 0, 0)
 
-        add_password_btn = QPushButton(QIcon('resources/icons/ui/plus_icon.svg'), '', self)
+        add_password_btn = QPushButton(icon('resources/icons/ui/plus_icon.svg'), '', self)
         add_password_btn.setObjectName('button')
         add_password_btn.setToolTip('Add a saved password')
         add_password_btn.setFixedSize(30, 30)
         add_password_btn.clicked.connect(self.addPassword)
-        import_from_chrome_btn = QPushButton(QIcon('resources/icons/ui/folder_icon.svg'), '', self)
+        import_from_chrome_btn = QPushButton(icon('resources/icons/ui/folder_icon.svg'), '', self)
         import_from_chrome_btn.setObjectName('button')
         import_from_chrome_btn.setToolTip('Import passwords from Chrome')
         import_from_chrome_btn.setFixedSize(30, 30)
@@ -48,96 +53,78 @@ class PasswordsDialog(QDialog):
         container.layout().addWidget(import_from_chrome_btn)
         container.layout().addWidget(self.search_box)
 
-        self.password_list = QListWidget(self)
+        self.model = PasswordsModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+
+        self.delegate = PasswordDelegate(self)
+        # Queued, so a row is never removed while the view is still handling the click on it
+        self.delegate.actionTriggered.connect(self.triggerAction, Qt.ConnectionType.QueuedConnection)
+
+        self.password_list = QListView(self)
         self.password_list.setObjectName('listWidget')
-        self.password_list.setSelectionMode(QListWidget.SelectionMode.NoSelection)
+        self.password_list.setModel(self.proxy)
+        self.password_list.setItemDelegate(self.delegate)
+        self.password_list.setSelectionMode(QListView.SelectionMode.NoSelection)
         self.password_list.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.password_list.setWordWrap(True)
         self.password_list.setUniformItemSizes(True)
-        self.password_list.itemDoubleClicked.connect(self.editPassword)
+        self.password_list.doubleClicked.connect(lambda index: self.editPassword(index.data()))
 
         self.layout().addWidget(container)
         self.layout().addSpacing(10)
         self.layout().addWidget(self.password_list)
 
-    def createList(self):
-        self.password_list.clear()
-        self.items = []
-
-        for url, value in ibrowse.passwords().items():
-            item = QListWidgetItem(url)
-            item.url = url
-            item.username = value[0]
-            item.password = value[1]
-
-            container = QWidget()
-            container.setLayout(QHBoxLayout())
-            container.layout().setContentsMargins(0, 0, 0, 0)
-
-            edit_password_btn = QPushButton('✏️')
-            edit_password_btn.setFixedWidth(20)
-            edit_password_btn.setToolTip('Edit saved password')
-            edit_password_btn.clicked.connect(lambda _, i=item: self.editPassword(i))
-            copy_username_btn = QPushButton('👤')
-            copy_username_btn.setFixedWidth(20)
-            copy_username_btn.setToolTip('Copy username')
-            copy_username_btn.clicked.connect(lambda _, i=item: QApplication.clipboard().setText(i.username))
-            copy_password_btn = QPushButton('🔑')
-            copy_password_btn.setFixedWidth(20)
-            copy_password_btn.setToolTip('Copy password')
-            copy_password_btn.clicked.connect(lambda _, i=item: QApplication.clipboard().setText(i.password))
-            delete_btn = QPushButton(QIcon('resources/icons/ui/close_icon.svg'), '', self)
-            delete_btn.setFixedWidth(20)
-            delete_btn.setToolTip('Delete password')
-            delete_btn.clicked.connect(lambda _, i=item: self.deletePassword(i))
-            container.layout().addStretch()
-            container.layout().addWidget(edit_password_btn)
-            container.layout().addWidget(copy_username_btn)
-            container.layout().addWidget(copy_password_btn)
-            container.layout().addWidget(delete_btn)
-
-            self.password_list.addItem(item)
-            self.password_list.setItemWidget(item, container)
-
-            self.items.append((item, url))
-
-        if self.search_box.text():
-            self.searchPasswords(self.search_box.text())
+    def triggerAction(self, action: str, url: str):
+        if action == 'edit':
+            self.editPassword(url)
             return
 
+        if action == 'delete':
+            self.deletePassword(url)
+            return
+
+        credentials = ibrowse.password(url)
+
+        if credentials:
+            QApplication.clipboard().setText(credentials[0] if action == 'username' else credentials[1])
+
     def addPassword(self):
         dialog = CreatePasswordDialog(self)
         dialog.exec()
+        self.passwordSaved(dialog.url_input.value())
+
+    def passwordSaved(self, url: str):
+        # The dialog only saves valid input, so the row appears if the store has the url now
+        if url and ibrowse.password(url):
+            self.model.addUrl(url)
 
-        self.createList()
+    def deletePassword(self, url: str):
+        ibrowse.remove_password(url)
 
-    def deletePassword(self, item: QListWidgetItem):
-        ibrowse.remove_password(item.url)
+        self.model.removeUrl(url)
 
-        self.password_list.takeItem(self.password_list.row(item))
+    def editPassword(self, url: str):
+        credentials = ibrowse.password(url)
+
+        if not credentials:
+            return
 
-    def editPassword(self, item: QListWidgetItem):
         dialog = CreatePasswordDialog(self)
         dialog.setWindowTitle('Edit Password')
-        dialog.url_input.setDefaultValue(item.url)
-        dialog.username_input.setDefaultValue(item.username)
-        dialog.password_input.setDefaultValue(item.password)
-
-        old = dialog.url_input.value()
+        dialog.url_input.setDefaultValue(url)
+        dialog.username_input.setDefaultValue(credentials[0])
+        dialog.password_input.setDefaultValue(credentials[1])
 
         dialog.exec()
-
-        if dialog.url_input.value() != old:
-            self.password_list.takeItem(self.password_list.row(item))
-
-        self.createList()
+        self.passwordSaved(dialog.url_input.value())
 
     def searchPasswords(self, text: str):
-        text = text.lower()
+        # Filtering has to see every password, so the rest are read in first
+        if text:
+            self.model.fetchAll()
 
-        for item, key in self.items:
-            is_match = text in key.lower()
-            item.setHidden(not is_match)
+        self.proxy.setFilterFixedString(text)
 
     def importFromChrome(self):
         file, _ = QFileDialog.getOpenFileName(
@@ -148,17 +135,27 @@ class PasswordsDialog(QDialog):
         )
 
         if file:
+            import csv
+
             with open(file, newline='', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
+                chunk = []
+
                 for row in reader:
                     url = row.get('origin', '') or row.get('origin_url', '') or row.get('url', '')
                     username = row.get('username', '') or row.get('username_value', '')
                     password = row.get('password', '') or row.get('password_value', '')
 
                     if url and username and password:
-                        ibrowse.add_password(url, username, password)
+                        chunk.append((url, username, password))
+
+                    if len(chunk) >= IMPORT_CHUNK_SIZE:
+                        ibrowse.add_passwords(chunk)
+                        chunk = []
+
+                ibrowse.add_passwords(chunk)
 
-            self.createList()
+            self.model.reload()
 
 
 class CreatePasswordDialog(QDialog):
@@ -0,0 +1,516 @@
+import json
+import os
+import threading
+import ibrowse
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWebEngineCore import QWebEngineDownloadRequest
+from PyQt6.QtWidgets import (QApplication, QDialog, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QProgressBar,
+    QPushButton, QVBoxLayout, QWidget)
+
+
+# Downloads transferring at the same time, later ones wait in the queue
+MAX_ACTIVE = 3
+# Bytes read from the network per write
+CHUNK_SIZE = 256 * 1024
+# Page downloads at least this large are fetched by Ibrowse itself, smaller ones are left to Chromium
+ENGINE_THRESHOLD = 16 * 1024 * 1024
+# Files at least this large are fetched over several connections when the server accepts ranges
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+CONNECTIONS = 4
+# Seconds a connection may go without receiving anything
+TIMEOUT = 30
+
+QUEUED = 'Queued'
+ACTIVE = 'Downloading'
+PAUSED = 'Paused'
+FINISHED = 'Finished'
+FAILED = 'Failed'
+CANCELLED = 'Cancelled'
+
+
+# A server answered a range that doesn't start at byte 0 with the whole file
+class RangesIgnored(OSError):
+    pass
+
+
+def format_size(size: int) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+
+        size /= 1024
+
+    return f'{size:.1f} GiB'
+
+
+# A file fetched by Ibrowse itself over HTTP, streamed to '<path>.part' and renamed when complete.
+# The headers (user agent, cookies) are sent with every request and never written to the sidecar.
+class Download:
+    def __init__(self, manager, url: str, path: str, headers: dict | None = None):
+        self.manager = manager
+        self.url = url
+        self.path = path
+        self.headers = headers or {}
+        self.part_path = path + '.part'
+        self.state_path = path + '.part.json'
+        self.error = ''
+
+        self._state = QUEUED
+        self._total = 0
+        # [start, end, received] for every connection, end is None when the size is unknown
+        self._ranges = []
+        self._stop = threading.Event()
+        self._running = False
+
+        self.loadState()
+
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    def state(self) -> str:
+        return self._state
+
+    def received(self) -> int:
+        return sum(part[2] for part in self._ranges)
+
+    def total(self) -> int:
+        return self._total
+
+    def begin(self):
+        # Resumed before the last transfer wound down, it starts again once that one has finished
+        if self._running:
+            return
+
+        self._state = ACTIVE
+        self._stop.clear()
+        self._running = True
+
+        self.manager.executor().submit(self.run)
+
+    def pause(self):
+        if self._state in (QUEUED, ACTIVE):
+            self._state = PAUSED
+            self._stop.set()
+
+            # The next queued download starts as soon as this one's connections have wound down
+            self.manager.schedule()
+
+    # Failed transfers pick up from the bytes already on disk
+    def canResume(self) -> bool:
+        return self._state in (PAUSED, FAILED)
+
+    def resume(self):
+        if self.canResume():
+            self._state = QUEUED
+            self.manager.schedule()
+
+    def cancel(self):
+        if self._state in (FINISHED, CANCELLED):
+            return
+
+        self._state = CANCELLED
+        self._stop.set()
+
+        if not self._running:
+            self.removeParts()
+
+    def loadState(self):
+        # A download that was paused or failed before Ibrowse closed carries on where it stopped
+        try:
+            with open(self.state_path) as file:
+                state = json.load(file)
+
+        except (OSError, ValueError):
+            return
+
+        if state.get('url') == self.url and os.path.exists(self.part_path):
+            self._total = state['total']
+            self._ranges = state['ranges']
+
+    def saveState(self):
+        with open(self.state_path, 'w') as file:
+            json.dump({'url': self.url, 'total': self._total, 'ranges': self._ranges}, file)
+
+    def removeParts(self):
+        for path in (self.part_path, self.state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def open(self, offset: int, end: int | None):
+        import urllib.request
+
+        # Always a range, a server that can't do ranges answers with the whole file instead
+        headers = {'User-Agent': 'Ibrowse', **self.headers, 'Range': f'bytes={offset}-{end - 1 if end is not None else ""}'}
+
+        return urllib.request.urlopen(urllib.request.Request(self.url, headers=headers), timeout=TIMEOUT)
+
+    def plan(self):
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+        # Asking for everything from byte 0 as a range tells whether the server can resume and split
+        response = self.open(0, None)
+        content_range = response.headers.get('Content-Range', '')
+
+        if response.status == 206 and '/' in content_range and not content_range.endswith('*'):
+            self._total = int(content_range.rsplit('/', 1)[1])
+
+        else:
+            self._total = int(response.headers.get('Content-Length') or 0)
+
+        if response.status == 206 and self._total >= PARALLEL_THRESHOLD:
+            size = -(-self._total // CONNECTIONS)
+            self._ranges = [[start, min(start + size, self._total), 0] for start in range(0, self._total, size)]
+
+        else:
+            self._ranges = [[0, self._total or None, 0]]
+
+        return response
+
+    def fetch(self, part: list, response=None):
+        start, end, _ = part
+
+        if end is not None and part[2] >= end - start:
+            return
+
+        if response is None:
+            response = self.open(start + part[2], end)
+
+            # The server ignored the range. Only a part starting at byte 0 can take the whole file.
+            if response.status == 200:
+                if start:
+                    response.close()
+                    raise RangesIgnored(f'Server ignored the range starting at byte {start + part[2]}')
+
+                part[2] = 0
+
+        with response, ibrowse.open_writer(self.part_path, start + part[2]) as writer:
+            while not self._stop.is_set():
+                size = CHUNK_SIZE if end is None else min(CHUNK_SIZE, end - start - part[2])
+
+                if size <= 0:
+                    break
+
+                chunk = response.read(size)
+
+                if not chunk:
+                    break
+
+                writer.write(chunk)
+                part[2] += len(chunk)
+
+        if not self._stop.is_set() and end is not None and part[2] < end - start:
+            raise OSError(f'Connection closed after {part[2]} of {end - start} bytes')
+
+    def transfer(self, response=None) -> list[Exception]:
+        errors = []
+
+        def fetch(part, response=None):
+            try:
+                self.fetch(part, response)
+
+            except Exception as error:
+                errors.append(error)
+                self._stop.set()
+
+        # The first range reuses the response that planned the download, the others get their own connection
+        threads = [threading.Thread(target=fetch, args=(part,), name='ibrowse-download', daemon=True)
+                   for part in self._ranges[1:]]
+
+        for thread in threads:
+            thread.start()
+
+        fetch(self._ranges[0], response)
+
+        for thread in threads:
+            thread.join()
+
+        return errors
+
+    def run(self):
+        try:
+            response = self.plan() if not self._ranges else None
+            errors = self.transfer(response)
+
+            # The server stopped answering ranges, so the whole file is fetched again over one connection
+            if self._state == ACTIVE and any(isinstance(error, RangesIgnored) for error in errors):
+                self._ranges = [[0, self._total or None, 0]]
+                self._stop.clear()
+
+                # Paused or cancelled while the connections wound down
+                errors = self.transfer() if self._state == ACTIVE else []
+
+            if errors and self._state == ACTIVE:
+                raise errors[0]
+
+            if self._state == ACTIVE:
+                os.replace(self.part_path, self.path)
+
+                if os.path.exists(self.state_path):
+                    os.remove(self.state_path)
+
+                self._state = FINISHED
+
+        except Exception as error:
+            if self._state == ACTIVE:
+                self._state = FAILED
+                self.error = str(error)
+
+        finally:
+            self._running = False
+
+            if self._state in (PAUSED, FAILED) and self._ranges:
+                self.saveState()
+
+            elif self._state == CANCELLED:
+                self.removeParts()
+
+            self.manager.finished.emit(self)
+
+
+# A download Chromium runs for a page: small files, saved pages and anything that isn't plain HTTP
+class BrowserDownload:
+    def __init__(self, manager, request: QWebEngineDownloadRequest):
+        self.manager = manager
+        self.request = request
+        self.error = ''
+
+        self._queued = False
+
+        request.isFinishedChanged.connect(lambda: manager.finished.emit(self))
+
+    def name(self) -> str:
+        return self.request.downloadFileName()
+
+    def state(self) -> str:
+        state = self.request.state()
+
+        if state == QWebEngineDownloadRequest.DownloadState.DownloadCompleted:
+            return FINISHED
+
+        if state == QWebEngineDownloadRequest.DownloadState.DownloadCancelled:
+            return CANCELLED
+
+        if state == QWebEngineDownloadRequest.DownloadState.DownloadInterrupted:
+            self.error = self.request.interruptReasonString()
+
+            return FAILED
+
+        if self._queued:
+            return QUEUED
+
+        return PAUSED if self.request.isPaused() else ACTIVE
+
+    def received(self) -> int:
+        return self.request.receivedBytes()
+
+    def total(self) -> int:
+        return max(0, self.request.totalBytes())
+
+    def begin(self):
+        self._queued = False
+        self.request.resume()
+
+    def queue(self):
+        self._queued = True
+        self.request.pause()
+
+    def pause(self):
+        if self.state() in (QUEUED, ACTIVE):
+            self._queued = False
+            self.request.pause()
+            self.manager.schedule()
+
+    # Chromium can't resume an interrupted download, only a paused one
+    def canResume(self) -> bool:
+        return self.state() == PAUSED
+
+    def resume(self):
+        if self.canResume():
+            self._queued = True
+            self.manager.schedule()
+
+    def cancel(self):
+        self.request.cancel()
+
+
+class DownloadManager(QObject):
+    added = pyqtSignal(object)
+    # Emitted from download threads, delivered on the GUI thread
+    finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._downloads = []
+        self._executor = None
+
+        self.finished.connect(self.schedule)
+
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(MAX_ACTIVE, thread_name_prefix='ibrowse-download')
+
+        return self._executor
+
+    def downloads(self) -> list:
+        return list(self._downloads)
+
+    def download(self, url: str, path: str, headers: dict | None = None) -> Download:
+        download = Download(self, url, path, headers)
+        self._downloads.append(download)
+        self.added.emit(download)
+        self.schedule()
+
+        return download
+
+    def addRequest(self, request: QWebEngineDownloadRequest, path: str, headers: dict):
+        # Large files are fetched again by the engine, which resumes them and splits them over several connections.
+        # Images saved from pages and other small files stay with Chromium, which serves them from its cache.
+        if (request.url().scheme() in ('http', 'https') and not request.isSavePageDownload()
+                and request.totalBytes() >= ENGINE_THRESHOLD):
+            request.cancel()
+
+            return self.download(request.url().toString(), path, headers)
+
+        request.setDownloadDirectory(os.path.dirname(path))
+        request.setDownloadFileName(os.path.basename(path))
+        request.accept()
+
+        download = BrowserDownload(self, request)
+        self._downloads.append(download)
+
+        # Chromium starts accepted downloads straight away, so ones over the limit are paused until a slot frees up
+        if sum(item.state() == ACTIVE for item in self._downloads) > MAX_ACTIVE:
+            download.queue()
+
+        self.added.emit(download)
+
+        return download
+
+    def schedule(self, *_):
+        active = sum(item.state() == ACTIVE for item in self._downloads)
+
+        for item in self._downloads:
+            if active >= MAX_ACTIVE:
+                break
+
+            if item.state() == QUEUED:
+                item.begin()
+                active += 1
+
+
+class DownloadsDialog(QDialog):
+    def __init__(self, manager: DownloadManager, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Downloads')
+        self.setLayout(QVBoxLayout())
+        self.resize(500, 300)
+
+        self.manager = manager
+        self.rows = []
+
+        self.download_list = QListWidget(self)
+        self.layout().addWidget(self.download_list)
+
+        for download in manager.downloads():
+            self.addRow(download)
+
+        manager.added.connect(self.addRow)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(250)
+        self._timer.timeout.connect(self.updateRows)
+
+    def showEvent(self, event):
+        self.updateRows()
+        self._timer.start()
+
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+
+        super().hideEvent(event)
+
+    def addRow(self, download):
+        item = QListWidgetItem(self.download_list)
+        container = QWidget()
+        container.setLayout(QVBoxLayout())
+        container.layout().setContentsMargins(5, 5, 5, 5)
+
+        name_label = QLabel(download.name())
+        progress_bar = QProgressBar()
+        progress_bar.setTextVisible(False)
+        progress_bar.setFixedHeight(6)
+        status_label = QLabel()
+
+        pause_btn = QPushButton('⏸')
+        pause_btn.setFixedWidth(20)
+        pause_btn.setToolTip('Pause or resume this download')
+        pause_btn.clicked.connect(lambda: download.resume() if download.canResume() else download.pause())
+        cancel_btn = QPushButton('✕')
+        cancel_btn.setFixedWidth(20)
+        cancel_btn.setToolTip('Cancel this download')
+        cancel_btn.clicked.connect(download.cancel)
+
+        status_row = QWidget()
+        status_row.setLayout(QHBoxLayout())
+        status_row.layout().setContentsMargins(0, 0, 0, 0)
+        status_row.layout().addWidget(status_label)
+        status_row.layout().addStretch()
+        status_row.layout().addWidget(pause_btn)
+        status_row.layout().addWidget(cancel_btn)
+
+        container.layout().addWidget(name_label)
+        container.layout().addWidget(progress_bar)
+        container.layout().addWidget(status_row)
+
+        item.setSizeHint(container.sizeHint())
+        self.download_list.setItemWidget(item, container)
+
+        self.rows.append((download, progress_bar, status_label, pause_btn, cancel_btn))
+        self.updateRows()
+
+    def updateRows(self):
+        for download, progress_bar, status_label, pause_btn, cancel_btn in self.rows:
+            state = download.state()
+            received = download.received()
+            total = download.total()
+
+            # Progress bars take ints, so sizes are shown in KiB to stay clear of the 32-bit limit
+            progress_bar.setRange(0, total // 1024 if total else 0)
+            progress_bar.setValue(received // 1024)
+
+            size = f'{format_size(received)} of {format_size(total)}' if total else format_size(received)
+            status_label.setText(f'{state}, {download.error}' if state == FAILED else f'{state}, {size}')
+
+            pause_btn.setText('▶' if state in (PAUSED, FAILED) else '⏸')
+            pause_btn.setEnabled(state not in (FINISHED, CANCELLED) and (state != FAILED or download.canResume()))
+            cancel_btn.setEnabled(state not in (FINISHED, CANCELLED))
+
+
+_manager = None
+_dialog = None
+
+
+def manager() -> DownloadManager:
+    global _manager
+
+    # One download queue for every window
+    if _manager is None:
+        _manager = DownloadManager(QApplication.instance())
+
+    return _manager
+
+
+def show_downloads():
+    global _dialog
+
+    if _dialog is None:
+        _dialog = DownloadsDialog(manager())
+
+    _dialog.show()
+    _dialog.raise_()
+    _dialog.activateWindow()
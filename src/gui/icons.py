@@ -0,0 +1,70 @@
+import ibrowse
+from PyQt6.QtCore import QByteArray, QSize, Qt
+from PyQt6.QtGui import QIcon, QIconEngine, QPixmap, QPainter
+from PyQt6.QtSvg import QSvgRenderer
+from PyQt6.QtWidgets import QApplication, QStyleOption
+
+
+# Shared icons by file name, every widget asking for the same file gets the same QIcon
+_icons: dict[str, QIcon] = {}
+_svg_parses = 0
+
+
+class SvgIconEngine(QIconEngine):
+    def __init__(self, renderer: QSvgRenderer, pixmaps: dict):
+        super().__init__()
+
+        self._renderer = renderer
+        self._pixmaps = pixmaps
+
+    @classmethod
+    def fromFile(cls, file_name: str):
+        global _svg_parses
+        _svg_parses += 1
+
+        return cls(QSvgRenderer(QByteArray(ibrowse.read_resource_bytes(file_name))), {})
+
+    def clone(self):
+        # Clones share the parsed SVG and the rendered pixmaps
+        return SvgIconEngine(self._renderer, self._pixmaps)
+
+    def actualSize(self, size: QSize, mode: QIcon.Mode, state: QIcon.State) -> QSize:
+        return size
+
+    def pixmap(self, size: QSize, mode: QIcon.Mode, state: QIcon.State) -> QPixmap:
+        return self.scaledPixmap(size, mode, state, 1.0)
+
+    def scaledPixmap(self, size: QSize, mode: QIcon.Mode, state: QIcon.State, scale: float) -> QPixmap:
+        key = (size.width(), size.height(), mode, state, scale)
+        pixmap = self._pixmaps.get(key)
+
+        if pixmap is None:
+            pixmap = QPixmap(round(size.width() * scale), round(size.height() * scale))
+            pixmap.fill(Qt.GlobalColor.transparent)
+
+            painter = QPainter(pixmap)
+            self._renderer.render(painter)
+            painter.end()
+
+            if mode != QIcon.Mode.Normal:
+                pixmap = QApplication.style().generatedIconPixmap(mode, pixmap, QStyleOption())
+
+            pixmap.setDevicePixelRatio(scale)
+            self._pixmaps[key] = pixmap
+
+        return pixmap
+
+    def paint(self, painter: QPainter, rect, mode: QIcon.Mode, state: QIcon.State):
+        pixmap = self.scaledPixmap(rect.size(), mode, state, painter.device().devicePixelRatioF())
+        painter.drawPixmap(rect, pixmap)
+
+
+def icon(file_name: str) -> QIcon:
+    if file_name not in _icons:
+        _icons[file_name] = QIcon(SvgIconEngine.fromFile(file_name))
+
+    return _icons[file_name]
+
+
+def svg_parses() -> int:
+    return _svg_parses
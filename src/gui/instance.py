@@ -0,0 +1,85 @@
+import getpass
+import json
+import os
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+
+# How long a new launch waits for the running instance, in milliseconds
+CONNECT_TIMEOUT = 500
+
+
+def server_name() -> str:
+    # One instance per user, other users on the same machine run their own
+    return f'ibrowse-{getpass.getuser()}'
+
+
+def connect() -> QLocalSocket | None:
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+
+    return socket if socket.waitForConnected(CONNECT_TIMEOUT) else None
+
+
+def forward(args: list[str]) -> bool:
+    socket = connect()
+
+    if socket is None:
+        return False
+
+    # Files are resolved here, the running instance has its own working directory
+    args = [os.path.abspath(arg) if os.path.exists(arg) else arg for arg in args]
+
+    socket.write(json.dumps(args).encode() + b'\n')
+    sent = socket.waitForBytesWritten(CONNECT_TIMEOUT)
+    socket.disconnectFromServer()
+
+    return sent
+
+
+class InstanceServer(QLocalServer):
+    # The arguments of a later launch, an empty list when it had none
+    received = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+
+        self.newConnection.connect(self.acceptConnection)
+
+    # Become the running instance. False when another instance answers, which happens when two
+    # launches race: the other one got the server after this one's forward() failed.
+    def start(self) -> bool:
+        if self.listen(server_name()):
+            return True
+
+        socket = connect()
+
+        if socket is not None:
+            socket.disconnectFromServer()
+
+            return False
+
+        # Left behind by an instance that crashed, nobody answers on it so it is safe to remove
+        QLocalServer.removeServer(server_name())
+
+        return self.listen(server_name())
+
+    def acceptConnection(self):
+        while self.hasPendingConnections():
+            socket = self.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self.readMessage(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def readMessage(self, socket: QLocalSocket):
+        if not socket.canReadLine():
+            return
+
+        try:
+            args = json.loads(bytes(socket.readLine()).decode())
+
+        except ValueError:
+            return
+
+        if isinstance(args, list):
+            self.received.emit([str(arg) for arg in args])
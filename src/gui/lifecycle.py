@@ -0,0 +1,146 @@
+import time
+import ibrowse
+from collections import Counter
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWebEngineCore import QWebEnginePage
+from PyQt6.QtWidgets import QApplication
+from src.gui.tab import Tab
+
+
+# How often background tabs are checked for idleness, in milliseconds
+CHECK_INTERVAL = 15 * 1000
+# How often renderer memory is measured against the budget, in milliseconds
+SAMPLE_INTERVAL = 10 * 1000
+# Idle time is counted from here at the earliest. Restored tabs keep the previous session's last use,
+# which still orders them, but they would otherwise be frozen or discarded on the first check.
+STARTED = time.time()
+
+LifecycleState = QWebEnginePage.LifecycleState
+
+
+def can_suspend(tab) -> bool:
+    if not isinstance(tab, Tab) or not tab.isMaterialized():
+        return False
+
+    # Locked tabs and tabs playing audio are left running
+    return not tab.isLocked() and not tab.page().recentlyAudible()
+
+
+def set_lifecycle_state(tab: Tab, state: LifecycleState) -> bool:
+    page = tab.page()
+
+    # Qt refuses states past the recommended one, e.g. freezing a visible page
+    if page.lifecycleState() == state or state.value > page.recommendedState().value:
+        return False
+
+    page.setLifecycleState(state)
+
+    return True
+
+
+class TabLifecycleManager(QObject):
+    def __init__(self, tab_view):
+        super().__init__(tab_view)
+
+        self.tab_view = tab_view
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(CHECK_INTERVAL)
+        self._timer.timeout.connect(self.update)
+        self._timer.start()
+
+    def update(self):
+        now = time.time()
+        freeze_after = ibrowse.freeze_after()
+        discard_after = ibrowse.discard_after()
+
+        for i in range(self.tab_view.count()):
+            tab = self.tab_view.widget(i)
+
+            if i == self.tab_view.currentIndex() or not can_suspend(tab):
+                continue
+
+            idle = now - max(tab.lastActive(), STARTED)
+
+            if discard_after and idle >= discard_after:
+                set_lifecycle_state(tab, LifecycleState.Discarded)
+
+            elif freeze_after and idle >= freeze_after:
+                set_lifecycle_state(tab, LifecycleState.Frozen)
+
+    def activate(self, tab: Tab):
+        if tab.isMaterialized() and tab.page().lifecycleState() != LifecycleState.Active:
+            # A discarded page reloads its last url when it becomes active again
+            tab.page().setLifecycleState(LifecycleState.Active)
+
+    def states(self) -> list[tuple[str, str]]:
+        tabs = [self.tab_view.widget(i) for i in range(self.tab_view.count())]
+
+        return [(tab.title(), tab.lifecycleState()) for tab in tabs if isinstance(tab, Tab)]
+
+
+# One per application, the budget covers the renderers of every window
+class MemoryMonitor(QObject):
+    # Emitted from an I/O worker thread, delivered on the GUI thread
+    sampled = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._sampling = False
+        self._usage = 0
+
+        self.sampled.connect(self.enforceBudget)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(SAMPLE_INTERVAL)
+        self._timer.timeout.connect(self.sample)
+        self._timer.start()
+
+    def liveTabs(self) -> list[Tab]:
+        # Spare new tabs are left out, they are not in a tab bar yet and are kept ready on purpose
+        tabs = [tab for window in QApplication.topLevelWidgets() for tab in window.findChildren(Tab)
+                if tab.tab_view.indexOf(tab) != -1]
+
+        return [tab for tab in tabs if tab.isMaterialized() and tab.page().renderProcessPid()]
+
+    def sample(self):
+        if self._sampling or not ibrowse.memory_budget():
+            return
+
+        pids = list({tab.page().renderProcessPid() for tab in self.liveTabs()})
+
+        if pids:
+            self._sampling = True
+            ibrowse.process_memory_async(pids).add_done_callback(self.sampleFinished)
+
+    def sampleFinished(self, future):
+        self.sampled.emit(future.result() if future.exception() is None else {})
+
+    def enforceBudget(self, memory: dict):
+        self._sampling = False
+        self._usage = sum(memory.values())
+        budget = ibrowse.memory_budget() * 1024 * 1024
+
+        if not budget or self._usage <= budget:
+            return
+
+        tabs = self.liveTabs()
+        sharers = Counter(tab.page().renderProcessPid() for tab in tabs)
+        usage = self._usage
+
+        # Least recently used first; a process shared by several tabs is split evenly between them
+        for tab in sorted(tabs, key=lambda tab: tab.lastActive()):
+            if usage <= budget:
+                break
+
+            if tab.isVisible() or not can_suspend(tab):
+                continue
+
+            pid = tab.page().renderProcessPid()
+
+            if set_lifecycle_state(tab, LifecycleState.Discarded):
+                usage -= memory.get(pid, 0) // sharers[pid]
+
+    def usage(self) -> int:
+        return self._usage
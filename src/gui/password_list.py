@@ -0,0 +1,152 @@
+from bisect import bisect_left
+import ibrowse
+from PyQt6.QtCore import QAbstractListModel, QEvent, QModelIndex, QRect, QSize, Qt, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton, QStyleOptionViewItem, QToolTip
+from src.gui.icons import icon
+
+
+# Saved urls read from the password store at a time, more are read as the list is scrolled
+FETCH_SIZE = 200
+BUTTON_SIZE = 20
+
+# The buttons painted on every row, as (action, text, icon file, tooltip)
+ACTIONS = [
+    ('edit', '✏️', None, 'Edit saved password'),
+    ('username', '👤', None, 'Copy username'),
+    ('password', '🔑', None, 'Copy password'),
+    ('delete', '', 'resources/icons/ui/close_icon.svg', 'Delete password')
+]
+
+
+# The saved urls in store order, read a page at a time so opening the list costs the same for any number of passwords
+class PasswordsModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._urls = []
+        self._complete = False
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._urls)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return self._urls[index.row()]
+
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._complete
+
+    def fetchMore(self, parent=QModelIndex()):
+        urls = ibrowse.password_urls(self._urls[-1] if self._urls else None, FETCH_SIZE)
+        self._complete = len(urls) < FETCH_SIZE
+
+        if urls:
+            self.beginInsertRows(QModelIndex(), len(self._urls), len(self._urls) + len(urls) - 1)
+            self._urls.extend(urls)
+            self.endInsertRows()
+
+    def fetchAll(self):
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def reload(self):
+        # Only the first page is read again, once the view asks for it
+        self.beginResetModel()
+        self._urls = []
+        self._complete = False
+        self.endResetModel()
+
+    def addUrl(self, url: str):
+        row = bisect_left(self._urls, url)
+
+        if row < len(self._urls) and self._urls[row] == url:
+            self.dataChanged.emit(self.index(row), self.index(row))
+            return
+
+        # Past the last page read, it shows up with a later page
+        if row == len(self._urls) and not self._complete:
+            return
+
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._urls.insert(row, url)
+        self.endInsertRows()
+
+    def removeUrl(self, url: str):
+        row = bisect_left(self._urls, url)
+
+        if row < len(self._urls) and self._urls[row] == url:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._urls[row]
+            self.endRemoveRows()
+
+
+# Paints the row buttons instead of creating widgets for them, so a row costs nothing until it is on screen
+class PasswordDelegate(QStyledItemDelegate):
+    # The action and the url of the row it was clicked on
+    actionTriggered = pyqtSignal(str, str)
+
+    def buttonRects(self, rect: QRect) -> list[QRect]:
+        top = rect.top() + (rect.height() - BUTTON_SIZE) // 2
+        left = rect.right() - len(ACTIONS) * BUTTON_SIZE
+
+        return [QRect(left + i * BUTTON_SIZE, top, BUTTON_SIZE, BUTTON_SIZE) for i in range(len(ACTIONS))]
+
+    def paint(self, painter, option: QStyleOptionViewItem, index: QModelIndex):
+        item = QStyleOptionViewItem(option)
+        self.initStyleOption(item, index)
+        style = item.widget.style() if item.widget else QApplication.style()
+
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, item, painter, item.widget)
+
+        for (_, text, icon_file, _), rect in zip(ACTIONS, self.buttonRects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.state = QStyle.StateFlag.State_Enabled
+            button.text = text
+
+            if icon_file:
+                button.icon = icon(icon_file)
+                button.iconSize = QSize(BUTTON_SIZE - 6, BUTTON_SIZE - 6)
+
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, item.widget)
+
+    def initStyleOption(self, option: QStyleOptionViewItem, index: QModelIndex):
+        super().initStyleOption(option, index)
+
+        # The url is elided before it runs under the buttons
+        option.rect = option.rect.adjusted(0, 0, -len(ACTIONS) * BUTTON_SIZE, 0)
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        size = super().sizeHint(option, index)
+
+        return QSize(size.width() + len(ACTIONS) * BUTTON_SIZE, max(size.height(), BUTTON_SIZE + 4))
+
+    def actionAt(self, rect: QRect, pos) -> tuple | None:
+        for action, button_rect in zip(ACTIONS, self.buttonRects(rect)):
+            if button_rect.contains(pos):
+                return action
+
+        return None
+
+    def editorEvent(self, event, model, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            action = self.actionAt(option.rect, event.position().toPoint())
+
+            if action:
+                self.actionTriggered.emit(action[0], index.data())
+
+                return True
+
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        action = self.actionAt(option.rect, event.pos())
+
+        if action:
+            QToolTip.showText(event.globalPos(), action[3], view)
+
+            return True
+
+        return super().helpEvent(event, view, option, index)
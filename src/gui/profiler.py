@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from PyQt6.QtCore import QObject, QEvent, QTimer
+
+
+# Startup profiling is switched on with IBROWSE_PROFILE_STARTUP=1 or --profile-startup. The trace is written in
+# Chrome's trace event format (open it in chrome://tracing or Perfetto) to IBROWSE_PROFILE_OUTPUT, which defaults
+# to startup_trace.json. With IBROWSE_PROFILE_EXIT=1 Ibrowse quits once the trace is written.
+ENABLED = os.environ.get('IBROWSE_PROFILE_STARTUP') == '1' or '--profile-startup' in sys.argv
+OUTPUT = os.environ.get('IBROWSE_PROFILE_OUTPUT', 'startup_trace.json')
+EXIT = os.environ.get('IBROWSE_PROFILE_EXIT') == '1'
+
+# Trace timestamps count from here, or from an earlier time given to begin()
+_origin = time.perf_counter()
+_events = []
+_open = {}
+_written = False
+
+
+def _timestamp(at: float | None = None) -> float:
+    # Trace timestamps are microseconds
+    return ((time.perf_counter() if at is None else at) - _origin) * 1e6
+
+
+# 'at' is a time.perf_counter() value for a span that started before it could be recorded, like main.py's
+# imports, which start before this module and PyQt6 are loaded. The trace then starts there.
+def begin(name: str, at: float | None = None):
+    global _origin
+
+    if ENABLED:
+        if at is not None and at < _origin and not _events and not _open:
+            _origin = at
+
+        _open[name] = _timestamp(at)
+
+
+def end(name: str, **args):
+    if ENABLED and name in _open:
+        start = _open.pop(name)
+        _events.append({'name': name, 'ph': 'X', 'ts': start, 'dur': _timestamp() - start, 'pid': os.getpid(),
+                        'tid': 0, 'args': args})
+
+
+@contextmanager
+def _span(name: str, args: dict):
+    begin(name)
+
+    try:
+        yield
+
+    finally:
+        end(name, **args)
+
+
+def span(name: str, **args):
+    return _span(name, args) if ENABLED else nullcontext()
+
+
+def mark(name: str, **args):
+    if ENABLED:
+        _events.append({'name': name, 'ph': 'i', 's': 'p', 'ts': _timestamp(), 'pid': os.getpid(), 'tid': 0,
+                        'args': args})
+
+
+def write():
+    global _written
+
+    if not ENABLED or _written:
+        return
+
+    _written = True
+
+    with open(OUTPUT, 'w') as file:
+        json.dump({'traceEvents': _events, 'displayTimeUnit': 'ms'}, file)
+
+
+# Marks the first paint of the window and the first load of every startup tab, then writes the trace
+class StartupTracker(QObject):
+    def __init__(self, app, window, timeout: int = 30000):
+        super().__init__(window)
+
+        self._app = app
+        self._pending = set()
+        self._painted = False
+        self._tracking = False
+
+        window.installEventFilter(self)
+
+        QTimer.singleShot(timeout, self.finish)
+
+    def track(self, tabs: list):
+        self._tracking = True
+
+        for tab in tabs:
+            if tab.isMaterialized():
+                self._pending.add(tab)
+                tab.browser().loadFinished.connect(lambda ok, t=tab: self.loaded(t, ok))
+
+        self.check()
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() == QEvent.Type.Paint and not self._painted:
+            self._painted = True
+            mark('first paint')
+            self.check()
+
+        return False
+
+    def loaded(self, tab, ok: bool):
+        if tab in self._pending:
+            self._pending.discard(tab)
+            mark('loadFinished', url=tab.activeUrl().toString(), ok=ok)
+            self.check()
+
+    def check(self):
+        if self._tracking and self._painted and not self._pending:
+            self.finish()
+
+    def finish(self):
+        if _written:
+            return
+
+        mark('startup finished')
+        write()
+
+        if EXIT:
+            self._app.quit()
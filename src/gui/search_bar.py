@@ -1,8 +1,8 @@
-from PyQt6.QtGui import QIcon
 import ibrowse
 from PyQt6.QtCore import QEvent, QTimer, QUrl, Qt, QRect, QPropertyAnimation, QEasingCurve, QPoint
 from PyQt6.QtWidgets import (QLineEdit, QCompleter, QMenu, QVBoxLayout, QWidget, QWidgetAction, QComboBox, QApplication,
     QHBoxLayout, QLabel)
+from src.gui.icons import icon
 from src.gui.commands import COMMANDS
 
 
@@ -13,7 +13,7 @@ class SearchBar(QLineEdit):
         self.setPlaceholderText('Search...')
         self.installEventFilter(self)
 
-        self.addAction(QIcon('resources/icons/ui/search_icon.svg'), QLineEdit.ActionPosition.LeadingPosition)
+        self.addAction(icon('resources/icons/ui/search_icon.svg'), QLineEdit.ActionPosition.LeadingPosition)
 
         self.updateCompleter()
 
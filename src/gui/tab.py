@@ -1,24 +1,19 @@
-import os
-import subprocess
-import sys
 import ibrowse
-from urllib.parse import urlparse
 from PyQt6.QtCore import QEventLoop, QPointF, QSize, QUrl, QTemporaryFile
-from PyQt6.QtGui import QKeySequence, QAction, QIcon, QPainter
+from PyQt6.QtGui import QKeySequence, QAction, QPainter
 from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEngineSettings, QWebEnginePage
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWidgets import (QDialog, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QApplication, QWidgetAction, QLabel, QMenu,
-    QMessageBox)
-from PyQt6.QtPrintSupport import QPrinter, QPrintDialog, QPrintPreviewDialog
-from src.gui.dialogs import CreateBookmarkDialog
+    QMessageBox, QFileDialog)
+from src.gui import watchdog
+from src.gui.icons import icon
 from src.gui.web_engine import WebEnginePage, WebEngineView
 from src.gui.engine_selector import EngineSelector
 from src.gui.search_bar import SearchBar
-from src.gui.quick_search_bar import QuickSearchBar
 
 
 class Tab(QWidget):
-    def __init__(self, tab_view, profile: QWebEngineProfile, url: str = '', parent=None):
+    def __init__(self, tab_view, profile: QWebEngineProfile, url: str = '', title: str = '', lazy: bool = False, parent=None):
         super().__init__(parent)
         self.setLayout(QVBoxLayout())
         self.layout().setContentsMargins(0, 0, 0, 0)
@@ -28,12 +23,20 @@ class Tab(QWidget):
         self._is_locked = False
         self._print_result_loop = QEventLoop()
         self._printer = None
+        self._page = None
+        self._browser = None
+        self._url = url
+        self._title = title
+        self._last_active = 0.0
 
         self.createUI()
-        self.createBrowser()
 
-        if url:
-            self.search(url)
+        # Lazy tabs only keep their url and title until they are first shown
+        if lazy:
+            self._search_bar.setUrl(QUrl(url))
+
+        else:
+            self.materialize()
 
     def close(self):
         self.tab_view.closeTab(self.tab_view.indexOf(self))
@@ -47,20 +50,20 @@ class Tab(QWidget):
 
         size = QSize(25, 30)
 
-        back_btn = QPushButton(QIcon('resources/icons/ui/back_icon.svg'), '', self)
-        back_btn.setFixedSize(size)
-        back_btn.setObjectName('button')
-        back_btn.setToolTip('Navigate backwards')
-        forward_btn = QPushButton(QIcon('resources/icons/ui/forward_icon.svg'), '', self)
-        forward_btn.setFixedSize(size)
-        forward_btn.setObjectName('button')
-        forward_btn.setToolTip('Navigate forwards')
-        reload_btn = QPushButton(QIcon('resources/icons/ui/reload_icon.svg'), '', self)
-        reload_btn.setFixedSize(size)
-        reload_btn.setObjectName('button')
-        reload_btn.setShortcut(QKeySequence('Ctrl+R'))
-        reload_btn.setToolTip('Reload the current page')
-        menu_btn = QPushButton(QIcon('resources/icons/ui/menu_access_icon.svg'), '', self)
+        self._back_btn = QPushButton(icon('resources/icons/ui/back_icon.svg'), '', self)
+        self._back_btn.setFixedSize(size)
+        self._back_btn.setObjectName('button')
+        self._back_btn.setToolTip('Navigate backwards')
+        self._forward_btn = QPushButton(icon('resources/icons/ui/forward_icon.svg'), '', self)
+        self._forward_btn.setFixedSize(size)
+        self._forward_btn.setObjectName('button')
+        self._forward_btn.setToolTip('Navigate forwards')
+        self._reload_btn = QPushButton(icon('resources/icons/ui/reload_icon.svg'), '', self)
+        self._reload_btn.setFixedSize(size)
+        self._reload_btn.setObjectName('button')
+        self._reload_btn.setShortcut(QKeySequence('Ctrl+R'))
+        self._reload_btn.setToolTip('Reload the current page')
+        menu_btn = QPushButton(icon('resources/icons/ui/menu_access_icon.svg'), '', self)
         menu_btn.setFixedSize(size)
         menu_btn.setObjectName('button')
         menu_btn.setToolTip('Ibrowse Menu')
@@ -82,22 +85,24 @@ class Tab(QWidget):
         combo_search_container.layout().addWidget(self._engine_combo)
         combo_search_container.layout().addWidget(self._search_bar)
 
-        nav_bar.layout().addWidget(back_btn)
-        nav_bar.layout().addWidget(forward_btn)
-        nav_bar.layout().addWidget(reload_btn)
+        nav_bar.layout().addWidget(self._back_btn)
+        nav_bar.layout().addWidget(self._forward_btn)
+        nav_bar.layout().addWidget(self._reload_btn)
         nav_bar.layout().addWidget(combo_search_container)
         nav_bar.layout().addWidget(menu_btn)
 
-        self._page = WebEnginePage(self.profile, self.tab_view)
+        self.layout().addWidget(nav_bar)
+
+    def createBrowser(self):
+        # The page is owned by the tab, so closing the tab frees it and its renderer
+        self._page = WebEnginePage(self.profile, self.tab_view, self)
         self._browser = WebEngineView(self._page, self.tab_view, self)
-        back_btn.clicked.connect(self._browser.back)
-        forward_btn.clicked.connect(self._browser.forward)
-        reload_btn.clicked.connect(self._browser.reload)
+        self._back_btn.clicked.connect(self._browser.back)
+        self._forward_btn.clicked.connect(self._browser.forward)
+        self._reload_btn.clicked.connect(self._browser.reload)
 
-        self.layout().addWidget(nav_bar)
         self.layout().addWidget(self._browser)
 
-    def createBrowser(self):
         self._browser.urlChanged.connect(self._search_bar.setUrl)
         self._browser.titleChanged.connect(self.tab_view.updateTab)
         self._browser.iconChanged.connect(self.tab_view.updateTab)
@@ -116,7 +121,36 @@ class Tab(QWidget):
         self._browser.settings().setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, True)
         self._browser.settings().setAttribute(QWebEngineSettings.WebAttribute.ScrollAnimatorEnabled, ibrowse.smooth_scrolling_enabled())
 
+    def materialize(self):
+        if self._browser is not None:
+            return
+
+        self.createBrowser()
+
+        if self._url:
+            self.search(self._url)
+
+    def teardown(self):
+        if self._browser is None:
+            return
+
+        self._browser.stopMedia()
+        self._browser.stop()
+
+        # The view goes before its page; both would otherwise live until the tab's deferred delete
+        self._browser.deleteLater()
+        self._page.deleteLater()
+
+        self._browser = None
+        self._page = None
+
+    def isMaterialized(self) -> bool:
+        return self._browser is not None
+
     def search(self, query: str):
+        if self._browser is None:
+            self.createBrowser()
+
         query = query.strip()
 
         if query.startswith('https'):
@@ -147,6 +181,20 @@ class Tab(QWidget):
             elif query == '/close':
                 self.close()
 
+            elif query == '/perf':
+                self.showPerformance()
+
+            elif query == '/perfdump':
+                self.dumpPerformance()
+
+            elif query == '/tasks':
+                from src.gui.task_manager import show_task_manager
+
+                show_task_manager()
+
+            elif query == '/downloads':
+                self.tab_view.showDownloads()
+
             else:
                 self.tab_view.addTab(self.fromHtml('resources/pages/help.html'), 'Help')
                 self.tab_view.setCurrentIndex(self.tab_view.count() - 1)
@@ -171,12 +219,16 @@ class Tab(QWidget):
 
     def quickSearch(self):
         if not hasattr(self, 'quick_search_bar'):
+            from src.gui.quick_search_bar import QuickSearchBar
+
             self.quick_search_bar = QuickSearchBar(self)
             self.quick_search_bar.setUrl(self._search_bar.text())
 
         self.quick_search_bar.exec()
 
     def bookmark(self):
+        from src.gui.dialogs import CreateBookmarkDialog
+
         dialog = CreateBookmarkDialog(self)
         dialog.url_input.setDefaultValue(self._browser.url().toString())
         dialog.input.setDefaultValue(self._browser.page().title())
@@ -196,6 +248,9 @@ class Tab(QWidget):
         self.tab_view.parent().restart()
 
     def printPreview(self):
+        # Print support is loaded the first time something is printed, it is not needed to start up
+        from PyQt6.QtPrintSupport import QPrinter, QPrintPreviewDialog
+
         if self._printer is None:
             self._printer = QPrinter()
 
@@ -204,7 +259,7 @@ class Tab(QWidget):
 
         preview.exec()
 
-    def printDocument(self, printer: QPrinter):
+    def printDocument(self, printer: 'QPrinter'):
         self._browser.print(printer)
 
         self._print_result_loop.exec(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
@@ -226,17 +281,36 @@ class Tab(QWidget):
         self.profile.clearHttpCache()
         self.profile.clearAllVisitedLinks()
 
-    def fromHtml(self, file_name: str):
-        html = ibrowse.read_html(file_name)
+    def fromHtml(self, file_name: str, cached: bool = True):
+        if self._browser is None:
+            self.createBrowser()
+
+        html = ibrowse.read_resource(file_name) if cached else ibrowse.read_html(file_name)
 
         if html:
-            self._browser.urlChanged.disconnect(self._search_bar.setUrl)
-            self._browser.setHtml(html, QUrl('about:blank'))
-            self._browser.setFocus()
-            self._browser.urlChanged.connect(self._search_bar.setUrl)
+            self.setPageHtml(html)
 
         return self
 
+    def setPageHtml(self, html: str):
+        if self._browser is None:
+            self.createBrowser()
+
+        self._browser.urlChanged.disconnect(self._search_bar.setUrl)
+        self._browser.setHtml(html, QUrl('about:blank'))
+        self._browser.setFocus()
+        self._browser.urlChanged.connect(self._search_bar.setUrl)
+
+    def showPerformance(self):
+        template = ibrowse.read_resource('resources/pages/perf.html')
+        self.setPageHtml(watchdog.start().reportHtml(template))
+
+    def dumpPerformance(self):
+        filename, _ = QFileDialog.getSaveFileName(self, 'Save Performance Report', 'ibrowse_perf.txt')
+
+        if filename:
+            ibrowse.write_html(filename, watchdog.start().report())
+
     def setLocked(self, locked: bool):
         self._is_locked = locked
 
@@ -256,4 +330,25 @@ class Tab(QWidget):
         return self._browser
 
     def activeUrl(self) -> QUrl:
+        if self._browser is None:
+            return QUrl(self._url)
+
         return self._browser.url()
+
+    def title(self) -> str:
+        if self._browser is None:
+            return self._title
+
+        return self._browser.title()
+
+    def lifecycleState(self) -> str:
+        if self._page is None:
+            return 'Unloaded'
+
+        return self._page.lifecycleState().name
+
+    def setLastActive(self, last_active: float):
+        self._last_active = last_active
+
+    def lastActive(self) -> float:
+        return self._last_active
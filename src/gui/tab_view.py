@@ -1,10 +1,18 @@
+import time
 import ibrowse
 from PyQt6.QtCore import QPoint, QTimer, QMimeData, QUrl, Qt
 from PyQt6.QtGui import QAction, QContextMenuEvent, QDragLeaveEvent, QDropEvent, QDragEnterEvent, QDragMoveEvent, QIcon, QKeySequence
 from PyQt6.QtWidgets import QHBoxLayout, QLabel, QPushButton, QTabBar, QTabWidget, QWidget, QWidgetAction
+from src.gui.icons import icon
 from src.gui.tab import Tab
-from src.gui.dialogs import PasswordsDialog
 from src.gui.context_menu import ContextMenu
+from src.gui.lifecycle import TabLifecycleManager
+
+
+# Number of new tabs kept built and loaded in the background, ready for Ctrl+N
+SPARE_TABS = 2
+# Time after startup before the first spare tab is built, in milliseconds
+SPARE_TAB_DELAY = 1000
 
 
 class TabBar(QTabBar):
@@ -73,7 +81,7 @@ class TabBar(QTabBar):
             keep_open = True
 
         self.setTabEnabled(index, False)
-        self.setTabIcon(index, QIcon('resources/icons/ui/locked_icon.svg'))
+        self.setTabIcon(index, icon('resources/icons/ui/locked_icon.svg'))
         self.setTabToolTip(index, 'This tab is locked')
 
         if keep_open:
@@ -85,8 +93,10 @@ class TabBar(QTabBar):
 
         if not self.isTabEnabled(index):
             self.setTabEnabled(index, True)
-            self.setTabIcon(index, tab.browser().icon())
-            self.setTabToolTip(index, tab.browser().title())
+            self.setTabToolTip(index, tab.title())
+
+            if tab.isMaterialized():
+                self.setTabIcon(index, tab.browser().icon())
 
     def createPlaceholderTab(self):
         if not hasattr(self, 'dummy_tab'):
@@ -108,10 +118,22 @@ class TabView(QTabWidget):
         self.setMovable(True)
         self.setTabsClosable(True)
 
-        self._passwords_dialog = PasswordsDialog(self)
+        self._passwords_dialog = None
+        self._lifecycle = TabLifecycleManager(self)
+        self._active_tab = None
+        self._spare_tabs = []
+
+        # A zero interval timer fires once the event loop has nothing else to do
+        self._refill_timer = QTimer(self)
+        self._refill_timer.setSingleShot(True)
+        self._refill_timer.setInterval(0)
+        self._refill_timer.timeout.connect(self.refillSpareTabs)
+
+        QTimer.singleShot(SPARE_TAB_DELAY, self.scheduleRefill)
 
         self.tabBarDoubleClicked.connect(self.newTab)
         self.tabCloseRequested.connect(self.closeTab)
+        self.currentChanged.connect(self.activateTab)
 
         self.createActions()
 
@@ -130,7 +152,7 @@ class TabView(QTabWidget):
 
         password_manager_action = self.addAction('Password Manager')
         password_manager_action.setShortcut(QKeySequence('Ctrl+K'))
-        password_manager_action.triggered.connect(lambda: self.currentTab().passwordManager().show())
+        password_manager_action.triggered.connect(lambda: self.passwordManager().show())
 
         bookmark_tab_action = self.addAction('Bookmark This Tab')
         bookmark_tab_action.setShortcut(QKeySequence('Ctrl+B'))
@@ -148,12 +170,17 @@ class TabView(QTabWidget):
         print_page_action.setShortcut(QKeySequence('Ctrl+P'))
         print_page_action.triggered.connect(lambda: self.currentTab().printPreview())
 
+        downloads_action = self.addAction('Downloads')
+        downloads_action.setShortcut(QKeySequence('Ctrl+J'))
+        downloads_action.triggered.connect(self.showDownloads)
+
         self.addAction(new_tab_action)
         self.addAction(new_window_action)
         self.addAction(close_tab_action)
         self.addAction(password_manager_action)
         self.addAction(bookmark_tab_action)
         self.addAction(quick_search_action)
+        self.addAction(downloads_action)
 
     def showMenu(self, button: QPushButton):
         if not hasattr(self, 'menu'):
@@ -167,7 +194,9 @@ class TabView(QTabWidget):
             bookmark_tab_action = QAction('Bookmark This Tab', self)
             bookmark_tab_action.triggered.connect(lambda: self.currentTab().bookmark())
             passwords_action = QAction('Passwords...', self)
-            passwords_action.triggered.connect(self._passwords_dialog.show)
+            passwords_action.triggered.connect(lambda: self.passwordManager().show())
+            downloads_action = QAction('Downloads...', self)
+            downloads_action.triggered.connect(self.showDownloads)
 
             if not hasattr(self, 'bookmarks_menu'):
                 self.bookmarks_menu = ContextMenu('Bookmarks', self)
@@ -185,6 +214,7 @@ class TabView(QTabWidget):
             self.menu.addAction(bookmark_tab_action)
             self.menu.addSeparator()
             self.menu.addAction(passwords_action)
+            self.menu.addAction(downloads_action)
             self.menu.addMenu(self.bookmarks_menu)
             self.menu.addSeparator()
             self.menu.addAction(smooth_scrolling_action)
@@ -201,7 +231,7 @@ class TabView(QTabWidget):
             container.setLayout(QHBoxLayout())
             label = QLabel(name)
             label.setToolTip('Open this bookmark')
-            remove_btn = QPushButton(QIcon('resources/icons/ui/close_icon.svg'), '', self)
+            remove_btn = QPushButton(icon('resources/icons/ui/close_icon.svg'), '', self)
             remove_btn.setFixedWidth(20)
             remove_btn.setToolTip('Remove this bookmark')
             remove_btn.clicked.connect(lambda _, u=action.url: self.currentTab().removeBookmark(u, self.bookmarks_menu, action))
@@ -226,19 +256,87 @@ class TabView(QTabWidget):
         self.currentTab().browser().back()
 
     def insertNewTab(self):
-        tab = Tab(self, self.parent().profile(), parent=self).fromHtml('resources/pages/new_tab.html')
+        tab = self.takeSpareTab()
         self.insertTab(self.currentIndex() + 1, tab, 'New Tab')
         self.setCurrentIndex(self.indexOf(tab))
 
-        QTimer.singleShot(300, self.startEditing)
+        self.startEditing()
 
     def newTab(self, start_editing=True):
-        tab = Tab(self, self.parent().profile(), parent=self).fromHtml('resources/pages/new_tab.html')
+        tab = self.takeSpareTab()
         self.addTab(tab, 'New Tab')
         self.setCurrentIndex(self.indexOf(tab))
 
         if start_editing:
-            QTimer.singleShot(300, self.startEditing)
+            self.startEditing()
+
+    def createNewTab(self) -> Tab:
+        return Tab(self, self.parent().profile(), parent=self).fromHtml('resources/pages/new_tab.html')
+
+    def takeSpareTab(self) -> Tab:
+        if self._spare_tabs:
+            tab = self._spare_tabs.pop(0)
+
+            # Built up to a session earlier, so bookmarks and the preferred engine are brought up to date
+            tab.searchBar().updateCompleter()
+            tab.engineCombo().setCurrentText(ibrowse.preferred_browser())
+
+        else:
+            tab = self.createNewTab()
+
+        self.scheduleRefill()
+
+        return tab
+
+    def scheduleRefill(self):
+        if len(self._spare_tabs) < SPARE_TABS:
+            self._refill_timer.start()
+
+    def refillSpareTabs(self):
+        # One tab per pass so a refill never holds up input for long
+        if len(self._spare_tabs) < SPARE_TABS:
+            tab = self.createNewTab()
+            tab.hide()
+
+            self._spare_tabs.append(tab)
+            self.scheduleRefill()
+
+    def restoreTab(self, url: str, title: str, last_active: float, lazy: bool) -> Tab:
+        tab = Tab(self, self.parent().profile(), url=url, title=title, lazy=lazy, parent=self)
+        tab.setLastActive(last_active)
+        label = title or url
+        index = self.addTab(tab, (label[:25] + '...') if len(label) > 25 else label)
+        self.setTabToolTip(index, label)
+
+        # Placeholders take their favicon from the profile's icon database instead of loading the page
+        if lazy:
+            self.parent().profile().requestIconForPageURL(
+                QUrl(url), 16, lambda favicon, *_, t=tab: self.setPlaceholderIcon(t, favicon)
+            )
+
+        return tab
+
+    def setPlaceholderIcon(self, tab: Tab, favicon: QIcon):
+        index = self.indexOf(tab)
+
+        if index != -1 and not tab.isMaterialized():
+            self.setTabIcon(index, favicon)
+
+    def activateTab(self, index: int):
+        tab = self.widget(index)
+        now = time.time()
+
+        # Idle time counts from when a tab went to the background, not from when it was selected
+        if self._active_tab is not None and self._active_tab is not tab:
+            self._active_tab.setLastActive(now)
+
+        self._active_tab = tab if isinstance(tab, Tab) else None
+
+        if isinstance(tab, Tab):
+            tab.setLastActive(now)
+            tab.materialize()
+
+            self._lifecycle.activate(tab)
 
     def newTabFromUrl(self, url: QUrl):
         tab = Tab(self, self.parent().profile(), url=url.toString(), parent=self)
@@ -260,8 +358,9 @@ class TabView(QTabWidget):
         tab = self.widget(index)
 
         if tab is not None:
-            tab.browser().stopMedia()
-            tab.browser().deleteLater()
+            if isinstance(tab, Tab):
+                tab.teardown()
+
             tab.deleteLater()
 
         self.removeTab(index)
@@ -272,5 +371,19 @@ class TabView(QTabWidget):
     def currentTab(self) -> Tab:
         return self.widget(self.currentIndex())
 
-    def passwordManager(self) -> PasswordsDialog:
+    def passwordManager(self) -> 'PasswordsDialog':
+        # Built on first use, it lists every saved password
+        if self._passwords_dialog is None:
+            from src.gui.dialogs import PasswordsDialog
+
+            self._passwords_dialog = PasswordsDialog(self)
+
         return self._passwords_dialog
+
+    def showDownloads(self):
+        from src.gui.downloads import show_downloads
+
+        show_downloads()
+
+    def lifecycle(self) -> TabLifecycleManager:
+        return self._lifecycle
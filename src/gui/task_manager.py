@@ -0,0 +1,233 @@
+import time
+import ibrowse
+from PyQt6 import sip
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (QAbstractItemView, QApplication, QDialog, QHBoxLayout, QHeaderView, QPushButton, QTableView,
+    QVBoxLayout, QWidget)
+from src.gui.lifecycle import LifecycleState, set_lifecycle_state
+from src.gui.tab import Tab
+
+
+# How often the table is refreshed, in milliseconds
+REFRESH_INTERVAL = 2000
+
+COLUMNS = ['URL', 'PID', 'Memory', 'CPU', 'State', 'Last Active', 'Audio']
+
+
+def format_idle(seconds: float) -> str:
+    if seconds < 60:
+        return f'{seconds:.0f} s'
+
+    if seconds < 3600:
+        return f'{seconds / 60:.0f} min'
+
+    return f'{seconds / 3600:.1f} h'
+
+
+class TasksModel(QAbstractTableModel):
+    # Emitted from an I/O worker thread, delivered on the GUI thread
+    sampled = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._tabs = []
+        self._rows = []
+        self._usage = {}
+        self._sampling = False
+
+        self.sampled.connect(self.usageSampled)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._tabs)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section]
+
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._rows[index.row()][index.column()]
+
+        if role == Qt.ItemDataRole.TextAlignmentRole and 0 < index.column() < 4:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+        return None
+
+    def tab(self, row: int) -> Tab:
+        return self._tabs[row]
+
+    def liveTabs(self) -> list[Tab]:
+        # Spare new tabs are not shown, they are not in a tab bar yet, nor are tabs of closed windows
+        return [tab for window in QApplication.topLevelWidgets() if window.isVisible()
+                for tab in window.findChildren(Tab) if tab.tab_view.indexOf(tab) != -1]
+
+    def isLive(self, tab: Tab) -> bool:
+        if sip.isdeleted(tab) or sip.isdeleted(tab.tab_view):
+            return False
+
+        return tab.tab_view.indexOf(tab) != -1 and tab.window().isVisible()
+
+    def describe(self, tab: Tab) -> list:
+        pid = tab.page().renderProcessPid() if tab.isMaterialized() else 0
+        rss, cpu = self._usage.get(pid, (None, None))
+
+        return [
+            tab.activeUrl().toString(),
+            str(pid) if pid else '',
+            f'{rss / 2 ** 20:.0f} MiB' if rss is not None else '',
+            f'{cpu:.1f}%' if cpu is not None else '',
+            tab.lifecycleState(),
+            'now' if tab.isVisible() else format_idle(time.time() - tab.lastActive()),
+            'Yes' if tab.isMaterialized() and tab.page().recentlyAudible() else ''
+        ]
+
+    def removeGone(self, live: set | None = None):
+        # Rows are only removed, appended or changed, so selections and scroll position survive a refresh
+        for row in reversed(range(len(self._tabs))):
+            tab = self._tabs[row]
+            gone = tab not in live if live is not None else not self.isLive(tab)
+
+            if gone:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._tabs[row]
+                del self._rows[row]
+                self.endRemoveRows()
+
+    def refresh(self):
+        tabs = self.liveTabs()
+        self.removeGone(set(tabs))
+
+        known = set(self._tabs)
+        added = [tab for tab in tabs if tab not in known]
+
+        if added:
+            self.beginInsertRows(QModelIndex(), len(self._tabs), len(self._tabs) + len(added) - 1)
+            self._tabs.extend(added)
+            self._rows.extend(self.describe(tab) for tab in added)
+            self.endInsertRows()
+
+        self.updateRows()
+        self.sample()
+
+    def updateRows(self):
+        # Only cells whose text changed are repainted
+        for row, tab in enumerate(self._tabs):
+            values = self.describe(tab)
+
+            for column, value in enumerate(values):
+                if self._rows[row][column] != value:
+                    self._rows[row][column] = value
+                    self.dataChanged.emit(self.index(row, column), self.index(row, column))
+
+    def sample(self):
+        pids = list({tab.page().renderProcessPid() for tab in self._tabs if tab.isMaterialized()} - {0})
+
+        if pids and not self._sampling:
+            self._sampling = True
+            ibrowse.process_usage_async(pids).add_done_callback(self.sampleFinished)
+
+    def sampleFinished(self, future):
+        self.sampled.emit(future.result() if future.exception() is None else {})
+
+    def usageSampled(self, usage: dict):
+        self._sampling = False
+        self._usage = usage
+
+        # Tabs may have been closed while the sample was taken
+        self.removeGone()
+        self.updateRows()
+
+
+class TaskManagerDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Task Manager')
+        self.setLayout(QVBoxLayout())
+        self.resize(900, 400)
+
+        self.model = TasksModel(self)
+
+        self.table = QTableView(self)
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        actions = QWidget(self)
+        actions.setLayout(QHBoxLayout())
+        actions.layout().setContentsMargins(0, 0, 0, 0)
+
+        freeze_btn = QPushButton('Freeze', self)
+        freeze_btn.setToolTip('Pause the selected tabs')
+        freeze_btn.clicked.connect(lambda: self.setSelectedState(LifecycleState.Frozen))
+        discard_btn = QPushButton('Discard', self)
+        discard_btn.setToolTip('Unload the selected tabs, they reload when selected')
+        discard_btn.clicked.connect(lambda: self.setSelectedState(LifecycleState.Discarded))
+        close_btn = QPushButton('Close', self)
+        close_btn.setToolTip('Close the selected tabs')
+        close_btn.clicked.connect(self.closeSelected)
+
+        actions.layout().addStretch()
+        actions.layout().addWidget(freeze_btn)
+        actions.layout().addWidget(discard_btn)
+        actions.layout().addWidget(close_btn)
+
+        self.layout().addWidget(self.table)
+        self.layout().addWidget(actions)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.model.refresh)
+
+    def showEvent(self, event):
+        self.model.refresh()
+        self._timer.start()
+
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        # Nothing is sampled while the task manager is closed
+        self._timer.stop()
+
+        super().hideEvent(event)
+
+    def selectedTabs(self) -> list[Tab]:
+        return [self.model.tab(index.row()) for index in self.table.selectionModel().selectedRows()]
+
+    def setSelectedState(self, state: LifecycleState):
+        for tab in self.selectedTabs():
+            if tab.isMaterialized() and not tab.isVisible():
+                set_lifecycle_state(tab, state)
+
+        self.model.refresh()
+
+    def closeSelected(self):
+        for tab in self.selectedTabs():
+            tab.close()
+
+        self.model.refresh()
+
+
+_dialog = None
+
+
+def show_task_manager():
+    global _dialog
+
+    # One task manager for every window
+    if _dialog is None:
+        _dialog = TaskManagerDialog()
+
+    _dialog.show()
+    _dialog.raise_()
+    _dialog.activateWindow()
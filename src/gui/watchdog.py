@@ -0,0 +1,140 @@
+import html
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, Qt
+
+
+# Stall detection wakes up every heartbeat, so it only runs from startup with IBROWSE_WATCHDOG=1 or --watchdog.
+# Otherwise it starts the first time /perf or /perfdump is used.
+ENABLED = os.environ.get('IBROWSE_WATCHDOG') == '1' or '--watchdog' in sys.argv
+# How often the GUI thread reports in, in milliseconds
+HEARTBEAT_INTERVAL = 50
+# How long the GUI thread may go without a heartbeat before it counts as stalled, in milliseconds
+STALL_THRESHOLD = 250
+# Number of stalls kept, older ones are dropped
+STALL_HISTORY = 100
+# Number of heartbeats the latency figures are taken over
+LATENCY_SAMPLES = 1200
+
+
+@dataclass
+class Stall:
+    beat: float
+    started: float
+    duration: float
+    stack: str
+
+
+class Watchdog(QObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Created on the GUI thread, which is the one being watched
+        self._thread_id = threading.get_ident()
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._stalls = deque(maxlen=STALL_HISTORY)
+        self._latency = deque(maxlen=LATENCY_SAMPLES)
+        self._stop = threading.Event()
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(HEARTBEAT_INTERVAL)
+        self._timer.timeout.connect(self.heartbeat)
+        self._timer.start()
+
+        self._watcher = threading.Thread(target=self.watch, name='ibrowse-watchdog', daemon=True)
+        self._watcher.start()
+
+        stop = self._stop
+        self.destroyed.connect(lambda: stop.set())
+
+    def heartbeat(self):
+        now = time.monotonic()
+
+        with self._lock:
+            previous = self._beat
+            self._beat = now
+            self._latency.append(max(0.0, (now - previous) * 1000 - HEARTBEAT_INTERVAL))
+
+            # The stall that just ended now has its real length
+            if self._stalls and self._stalls[-1].beat == previous:
+                self._stalls[-1].duration = now - previous
+
+    def watch(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL / 1000):
+            with self._lock:
+                beat = self._beat
+                recorded = bool(self._stalls) and self._stalls[-1].beat == beat
+
+            blocked = time.monotonic() - beat
+
+            if blocked * 1000 < STALL_THRESHOLD:
+                continue
+
+            if recorded:
+                with self._lock:
+                    self._stalls[-1].duration = blocked
+
+                continue
+
+            # The stack is taken while the GUI thread is still stuck, so it shows what it is stuck in
+            frame = sys._current_frames().get(self._thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else ''
+
+            with self._lock:
+                self._stalls.append(Stall(beat, time.time() - blocked, blocked, stack))
+
+    def stalls(self) -> list[Stall]:
+        with self._lock:
+            return list(self._stalls)
+
+    def latency(self) -> dict:
+        with self._lock:
+            samples = sorted(self._latency)
+
+        if not samples:
+            return {'median': 0.0, 'p99': 0.0, 'max': 0.0}
+
+        return {
+            'median': samples[len(samples) // 2],
+            'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+            'max': samples[-1]
+        }
+
+    def report(self) -> str:
+        lines = ['Event loop latency (ms): ' + ', '.join(f'{k} {v:.1f}' for k, v in self.latency().items()), '']
+
+        for stall in reversed(self.stalls()):
+            started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stall.started))
+            lines.append(f'{started}  blocked for {stall.duration * 1000:.0f} ms')
+            lines.append(stall.stack)
+
+        return '\n'.join(lines)
+
+    def reportHtml(self, template: str) -> str:
+        latency = ''.join(f'<li>{name}: <code>{value:.1f} ms</code></li>' for name, value in self.latency().items())
+        stalls = ''.join(
+            f'<h3>{time.strftime("%H:%M:%S", time.localtime(stall.started))}, '
+            f'blocked for {stall.duration * 1000:.0f} ms</h3><pre>{html.escape(stall.stack)}</pre>'
+            for stall in reversed(self.stalls())
+        )
+
+        return (template
+                .replace('<!-- latency -->', latency)
+                .replace('<!-- stalls -->', stalls or '<p>No stalls recorded.</p>'))
+
+
+def instance() -> Watchdog | None:
+    watchdogs = QCoreApplication.instance().findChildren(Watchdog)
+
+    return watchdogs[0] if watchdogs else None
+
+
+def start() -> Watchdog:
+    return instance() or Watchdog(QCoreApplication.instance())
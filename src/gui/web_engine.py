@@ -1,12 +1,12 @@
 import ibrowse
-import requests
-from PyQt6.QtCore import QFileInfo, Qt, QPoint
-from PyQt6.QtGui import QAction, QImage
+from PyQt6.QtCore import QDateTime, Qt, QPoint, QUrl
+from PyQt6.QtGui import QAction
+from PyQt6.QtNetwork import QNetworkCookie
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWidgets import QFileDialog, QApplication
+from PyQt6.QtWidgets import QFileDialog
 from PyQt6.QtWebEngineCore import (QWebEngineProfile, QWebEngineDownloadRequest, QWebEnginePage,
                                    QWebEngineContextMenuRequest, QWebEngineFullScreenRequest)
-from urllib.parse import urlparse
+from src.gui.autofill import AutofillBridge, install_script
 
 
 class WebEngineProfile(QWebEngineProfile):
@@ -15,10 +15,17 @@ class WebEngineProfile(QWebEngineProfile):
         self.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
         self.setCachePath(ibrowse.cache_dir())
         self.setPersistentStoragePath(ibrowse.cache_dir())
+        install_script(self)
+
+        # Copies of Chromium's cookies for the download manager, only kept once something is downloaded
+        self._cookies = None
 
         self.downloadRequested.connect(self.download)
 
     def download(self, request: QWebEngineDownloadRequest):
+        # The cookies load while the save dialog is open
+        self.trackCookies()
+
         filename, _ = QFileDialog.getSaveFileName(
             self.parent(),
             'Save As',
@@ -26,15 +33,67 @@ class WebEngineProfile(QWebEngineProfile):
         )
 
         if filename:
-            request.setDownloadDirectory(QFileInfo(filename).path())
-            request.setDownloadFileName(QFileInfo(filename).fileName())
-            request.accept()
+            from src.gui.downloads import manager, show_downloads
+
+            manager().addRequest(request, filename, self.downloadHeaders(request.url()))
+            show_downloads()
+
+    def trackCookies(self):
+        if self._cookies is not None:
+            return
+
+        self._cookies = {}
+
+        store = self.cookieStore()
+        store.cookieAdded.connect(self.cookieAdded)
+        store.cookieRemoved.connect(self.cookieRemoved)
+        store.loadAllCookies()
+
+    def cookieAdded(self, cookie: QNetworkCookie):
+        self._cookies[(cookie.domain(), cookie.path(), bytes(cookie.name()))] = QNetworkCookie(cookie)
+
+    def cookieRemoved(self, cookie: QNetworkCookie):
+        self._cookies.pop((cookie.domain(), cookie.path(), bytes(cookie.name())), None)
+
+    def downloadHeaders(self, url: QUrl) -> dict:
+        # What Chromium would send for the url, so files behind a login can be fetched by the download manager
+        host = url.host().lower()
+        path = url.path() or '/'
+        now = QDateTime.currentDateTime()
+        cookies = []
+
+        for cookie in (self._cookies or {}).values():
+            domain = cookie.domain().lower()
+            cookie_path = cookie.path() or '/'
+
+            # A leading dot marks a cookie for the domain and its subdomains, without one it is for that host only
+            if not (host == domain.lstrip('.') or domain.startswith('.') and host.endswith(domain)):
+                continue
+
+            if path != cookie_path and not path.startswith(cookie_path.rstrip('/') + '/'):
+                continue
+
+            if cookie.isSecure() and url.scheme() != 'https':
+                continue
+
+            if not cookie.isSessionCookie() and cookie.expirationDate() <= now:
+                continue
+
+            cookies.append(f'{bytes(cookie.name()).decode("latin-1")}={bytes(cookie.value()).decode("latin-1")}')
+
+        headers = {'User-Agent': self.httpUserAgent()}
+
+        if cookies:
+            headers['Cookie'] = '; '.join(cookies)
+
+        return headers
 
 
 class WebEnginePage(QWebEnginePage):
-    def __init__(self, profile, tab_view):
-        super().__init__(profile, tab_view)
+    def __init__(self, profile, tab_view, parent=None):
+        super().__init__(profile, parent)
         self.tab_view = tab_view
+        self.autofill = AutofillBridge(self)
 
         self.fullScreenRequested.connect(self.showFullScreenMode)
 
@@ -78,7 +137,6 @@ class WebEngineView(QWebEngineView):
         menu.removeAction(self.pageAction(QWebEnginePage.WebAction.DownloadLinkToDisk))
         menu.removeAction(self.pageAction(QWebEnginePage.WebAction.InspectElement))
         menu.removeAction(self.pageAction(QWebEnginePage.WebAction.ViewSource))
-        data = self.lastContextMenuRequest()
 
         menu.addSeparator()
 
@@ -95,99 +153,24 @@ class WebEngineView(QWebEngineView):
             menu.insertAction(self.pageAction(QWebEnginePage.WebAction.PasteAndMatchStyle), paste_username_action)
             menu.insertAction(self.pageAction(QWebEnginePage.WebAction.PasteAndMatchStyle), paste_password_action)
 
-        if not hasattr(self, 'connected_actions'):
-            self.connected_actions = True
-            self.pageAction(
-                QWebEnginePage.WebAction.DownloadImageToDisk
-            ).triggered.connect(lambda: self.saveImage(data))
-            self.pageAction(
-                QWebEnginePage.WebAction.CopyImageToClipboard
-            ).triggered.connect(lambda: self.copyImage(data))
-            self.pageAction(
-                QWebEnginePage.WebAction.CopyImageUrlToClipboard
-            ).triggered.connect(lambda: self.copyImageUrl(data))
-
+        # The image actions are left to Chromium: saving goes through downloadRequested and is served from
+        # the profile's cache with its cookies, copying uses the image the page has already decoded
         menu.exec(self.mapToGlobal(pos))
 
-    def saveImage(self, data: QWebEngineContextMenuRequest):
-        response = requests.get(data.mediaUrl().toString())
-
-        if response.status_code == 200:
-            url_filename = data.mediaUrl().toString().split('/')[-1]
-            filename, _ = QFileDialog.getSaveFileName(self,
-                                                      'Save Image As',
-                                                      url_filename,
-                                                      'Image files (*.)')
-
-            if filename and '.' in filename:
-                ibrowse.write_bytes(filename, response.content)
-
-    def copyImage(self, data: QWebEngineContextMenuRequest):
-        image_url = data.mediaUrl().toString()
-        response = requests.get(image_url)
-
-        if response.status_code == 200:
-            image = QImage.fromData(response.content)
-
-            if not image.isNull():
-                clipboard = QApplication.clipboard()
-                clipboard.setImage(image)
-
-    def copyImageUrl(self, data: QWebEngineContextMenuRequest):
-        image_url = data.mediaUrl().toString()
-
-        clipboard = QApplication.clipboard()
-        clipboard.setText(image_url)
-
     def printPage(self, data: QWebEngineContextMenuRequest):
         self.tab_view.currentTab().printPreview()
 
     def pasteUsername(self, data: QWebEngineContextMenuRequest):
-        username = None
-
-        for url, value in ibrowse.passwords().items():
-            if self.normalizeUrl(url) == self.normalizeUrl(self.url().toString()):
-                username = value[0]
-
-        if username:
-            script = f"""
-                (function() {{
-                    const focusedElement = document.activeElement;
-                    if (focusedElement) {{
-                        focusedElement.value = '{username}';
-                        focusedElement.selectionStart = focusedElement.selectionEnd = '{len(username)}';
-                        focusedElement.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                    }}
-                }})();
-            """
-            self.page().runJavaScript(script)
+        credentials = ibrowse.lookup_credentials(self.url().toString())
+
+        if credentials and credentials[0]:
+            self.page().autofill.fill(credentials[0])
 
     def pastePassword(self, data: QWebEngineContextMenuRequest):
-        password = None
-
-        for url, value in ibrowse.passwords().items():
-            if self.normalizeUrl(url) == self.normalizeUrl(self.url().toString()):
-                password = value[1]
-
-        if password:
-            script = f"""
-                (function() {{
-                    const focusedElement = document.activeElement;
-                    if (focusedElement) {{
-                        focusedElement.value = '{password}';
-                        focusedElement.selectionStart = focusedElement.selectionEnd = '{len(password)}';
-                        focusedElement.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                    }}
-                }})();
-            """
-            self.page().runJavaScript(script)
-
-    def normalizeUrl(self, url: str):
-        parsed = urlparse(url if '://' in url else 'https://' + url)
-        netloc = parsed.netloc.lower()
-        path = parsed.path.rstrip('/')
-
-        return f'{netloc}{path}'
+        credentials = ibrowse.lookup_credentials(self.url().toString())
+
+        if credentials and credentials[1]:
+            self.page().autofill.fill(credentials[1])
 
     def stopMedia(self):
         self.page().setAudioMuted(True)
@@ -16,22 +16,53 @@ fn test() -> PyResult<()> {
 fn ibrowse(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(test, m)?)?;
     m.add_function(wrap_pyfunction!(user::data::passwords, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::password_urls, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::password, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::lookup_credentials, m)?)?;
     m.add_function(wrap_pyfunction!(user::data::bookmarks, m)?)?;
     m.add_function(wrap_pyfunction!(user::data::previous_tabs, m)?)?;
     m.add_function(wrap_pyfunction!(user::data::preferred_browser, m)?)?;
     m.add_function(wrap_pyfunction!(user::data::smooth_scrolling_enabled, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::eager_restore_count, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::freeze_after, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::discard_after, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::memory_budget, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::passwords_async, m)?)?;
+    m.add_function(wrap_pyfunction!(user::data::bookmarks_async, m)?)?;
     m.add_function(wrap_pyfunction!(user::passwords::add_password, m)?)?;
     m.add_function(wrap_pyfunction!(user::passwords::remove_password, m)?)?;
+    m.add_function(wrap_pyfunction!(user::passwords::add_passwords, m)?)?;
+    m.add_function(wrap_pyfunction!(user::passwords::remove_passwords, m)?)?;
     m.add_function(wrap_pyfunction!(user::bookmarks::add_bookmark, m)?)?;
     m.add_function(wrap_pyfunction!(user::bookmarks::remove_bookmark, m)?)?;
+    m.add_function(wrap_pyfunction!(user::bookmarks::add_bookmarks, m)?)?;
+    m.add_function(wrap_pyfunction!(user::bookmarks::remove_bookmarks, m)?)?;
     m.add_function(wrap_pyfunction!(user::settings::set_previous_tabs, m)?)?;
     m.add_function(wrap_pyfunction!(user::settings::set_preferred_browser, m)?)?;
     m.add_function(wrap_pyfunction!(user::settings::set_smooth_scrolling, m)?)?;
+    m.add_function(wrap_pyfunction!(user::settings::set_eager_restore_count, m)?)?;
+    m.add_function(wrap_pyfunction!(user::settings::set_freeze_after, m)?)?;
+    m.add_function(wrap_pyfunction!(user::settings::set_discard_after, m)?)?;
+    m.add_function(wrap_pyfunction!(user::settings::set_memory_budget, m)?)?;
     m.add_function(wrap_pyfunction!(system::dirs::config_dir, m)?)?;
     m.add_function(wrap_pyfunction!(system::dirs::cache_dir, m)?)?;
     m.add_function(wrap_pyfunction!(system::file_ops::read_html, m)?)?;
     m.add_function(wrap_pyfunction!(system::file_ops::write_html, m)?)?;
     m.add_function(wrap_pyfunction!(system::file_ops::write_bytes, m)?)?;
+    m.add_function(wrap_pyfunction!(system::file_ops::read_html_async, m)?)?;
+    m.add_function(wrap_pyfunction!(system::file_ops::write_html_async, m)?)?;
+    m.add_function(wrap_pyfunction!(system::file_ops::write_bytes_async, m)?)?;
+    m.add_function(wrap_pyfunction!(system::file_ops::open_writer, m)?)?;
+    m.add_function(wrap_pyfunction!(system::resources::read_resource, m)?)?;
+    m.add_function(wrap_pyfunction!(system::resources::read_resource_bytes, m)?)?;
+    m.add_function(wrap_pyfunction!(system::resources::resource_cache_stats, m)?)?;
+    m.add_function(wrap_pyfunction!(system::processes::process_memory, m)?)?;
+    m.add_function(wrap_pyfunction!(system::processes::process_memory_async, m)?)?;
+    m.add_function(wrap_pyfunction!(system::processes::process_usage, m)?)?;
+    m.add_function(wrap_pyfunction!(system::processes::process_usage_async, m)?)?;
+    m.add_class::<system::file_ops::Writer>()?;
+    m.add_function(wrap_pyfunction!(system::store::flush, m)?)?;
+    m.add_function(wrap_pyfunction!(system::store::config_cache_stats, m)?)?;
 
     Ok(())
 }
@@ -1,100 +1,186 @@
+use crate::system::tasks;
+use pyo3::buffer::PyBuffer;
+use pyo3::prelude::*;
 use pyo3::{PyErr, PyResult, pyfunction};
-use serde::{Deserialize, Serialize};
-use std::collections::HashMap;
+use pyo3::types::PyBytes;
+use std::borrow::Cow;
 use std::fs;
-use std::io::{Read, Write};
-use std::path::PathBuf;
+use std::io::{BufWriter, Read, Seek, SeekFrom, Write};
+
+// Buffer size of Writer, large enough to turn small chunks into few write calls
+const WRITER_CAPACITY: usize = 256 * 1024;
 
 // Open an HTML in UTF-8 encoding and return a Python string of the contents
 #[pyfunction]
-pub fn read_html(file_name: &str) -> PyResult<String> {
-    let mut file = fs::File::open(file_name).map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to open file: {}", e))
-    })?;
-    let mut contents = String::new();
-
-    file.read_to_string(&mut contents).map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to read file: {}", e))
-    })?;
-    Ok(contents)
+pub fn read_html(py: Python<'_>, file_name: &str) -> PyResult<String> {
+    py.allow_threads(|| {
+        let mut file = fs::File::open(file_name).map_err(|e| {
+            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to open file: {}", e))
+        })?;
+        let mut contents = String::new();
+
+        file.read_to_string(&mut contents).map_err(|e| {
+            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to read file: {}", e))
+        })?;
+        Ok(contents)
+    })
 }
 
 // Write HTML contents to a file
 #[pyfunction]
-pub fn write_html(file_name: &str, contents: &str) -> PyResult<()> {
-    let mut file = fs::File::create(file_name).map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to create file: {}", e))
-    })?;
+pub fn write_html(py: Python<'_>, file_name: &str, contents: &str) -> PyResult<()> {
+    py.allow_threads(|| {
+        let mut file = fs::File::create(file_name).map_err(|e| {
+            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to create file: {}", e))
+        })?;
+
+        file.write_all(contents.as_bytes()).map_err(|e| {
+            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to write to file: {}", e))
+        })?;
+
+        Ok(())
+    })
+}
 
-    file.write_all(contents.as_bytes()).map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to write to file: {}", e))
-    })?;
+// The memory behind a Python buffer (bytes, bytearray, memoryview, mmap, ...). Read-only buffers are
+// borrowed without copying. Writable ones are copied, as another thread could change them while the
+// GIL is released.
+fn buffer_bytes<'a>(py: Python<'_>, buffer: &'a PyBuffer<u8>) -> PyResult<Cow<'a, [u8]>> {
+    if !buffer.readonly() || !buffer.is_c_contiguous() {
+        return Ok(Cow::Owned(buffer.to_vec(py)?));
+    }
 
-    Ok(())
+    // The buffer stays exported (and so can't be resized or freed) for as long as `buffer` lives
+    Ok(Cow::Borrowed(unsafe { std::slice::from_raw_parts(buffer.buf_ptr() as *const u8, buffer.len_bytes()) }))
 }
 
-// Write Python bytes to a file
+// Write any Python buffer (bytes, bytearray, memoryview, mmap, ...) to a file, without copying it when it is read-only
 #[pyfunction]
-pub fn write_bytes(file_name: &str, contents: &[u8]) -> PyResult<()> {
-    let mut file = fs::File::create(file_name).map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to create file: {}", e))
-    })?;
+pub fn write_bytes(py: Python<'_>, file_name: &str, contents: PyBuffer<u8>) -> PyResult<()> {
+    let contents = buffer_bytes(py, &contents)?;
+
+    py.allow_threads(|| {
+        let mut file = fs::File::create(file_name).map_err(|e| {
+            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to create file: {}", e))
+        })?;
 
-    file.write_all(contents).map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to write to file: {}", e))
-    })?;
+        file.write_all(&contents).map_err(|e| {
+            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to write to file: {}", e))
+        })?;
 
-    Ok(())
+        Ok(())
+    })
 }
 
-#[derive(Serialize, Deserialize, Debug)]
-pub struct BrowserConfig {
-    pub(crate) passwords: HashMap<String, [String; 2]>,
-    pub(crate) bookmarks: HashMap<String, String>,
-    pub(crate) previous_tabs: Vec<String>,
-    pub(crate) preferred_browser: String,
-    pub(crate) smooth_scrolling: bool,
+// A file that is written chunk by chunk, so large downloads never have to sit in memory as a whole
+#[pyclass(module = "ibrowse")]
+pub struct Writer {
+    file: Option<BufWriter<fs::File>>,
 }
 
-impl Default for BrowserConfig {
-    fn default() -> Self {
-        BrowserConfig {
-            passwords: HashMap::new(),
-            bookmarks: HashMap::new(),
-            previous_tabs: Vec::new(),
-            preferred_browser: String::new(),
-            smooth_scrolling: false,
-        }
+impl Writer {
+    fn file(&mut self) -> PyResult<&mut BufWriter<fs::File>> {
+        self.file.as_mut().ok_or_else(|| {
+            PyErr::new::<pyo3::exceptions::PyValueError, _>("Writer is closed")
+        })
     }
 }
 
-fn get_config_path() -> PathBuf {
-    let config_dir = dirs::config_dir()
-        .unwrap_or_else(|| std::env::temp_dir())
-        .join("ibrowse");
+#[pymethods]
+impl Writer {
+    // Append a chunk (any Python buffer) and return the number of bytes written
+    fn write(&mut self, py: Python<'_>, chunk: PyBuffer<u8>) -> PyResult<usize> {
+        let chunk = buffer_bytes(py, &chunk)?;
+        let file = self.file()?;
 
-    fs::create_dir_all(&config_dir).expect("Failed to create config dir");
+        py.allow_threads(|| file.write_all(&chunk)).map_err(|e| {
+            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to write to file: {}", e))
+        })?;
 
-    config_dir.join("config.json")
-}
+        Ok(chunk.len())
+    }
+
+    fn flush(&mut self, py: Python<'_>) -> PyResult<()> {
+        let file = self.file()?;
+
+        py.allow_threads(|| file.flush()).map_err(|e| {
+            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to write to file: {}", e))
+        })
+    }
+
+    // Flush and close the file; closing twice is fine
+    fn close(&mut self, py: Python<'_>) -> PyResult<()> {
+        match self.file.take() {
+            Some(mut file) => py.allow_threads(|| file.flush()).map_err(|e| {
+                PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to write to file: {}", e))
+            }),
+            None => Ok(()),
+        }
+    }
 
-pub fn load_config() -> BrowserConfig {
-    let path = get_config_path();
-    if !path.exists() {
-        save_config(&BrowserConfig::default());
+    #[getter]
+    fn closed(&self) -> bool {
+        self.file.is_none()
     }
 
-    let mut file = fs::File::open(&path).expect("Failed to open config");
-    let mut contents = String::new();
-    file.read_to_string(&mut contents).unwrap();
+    fn __enter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __exit__(
+        &mut self,
+        py: Python<'_>,
+        _exc_type: PyObject,
+        _exc_value: PyObject,
+        _traceback: PyObject,
+    ) -> PyResult<bool> {
+        self.close(py)?;
 
-    serde_json::from_str(&contents).unwrap_or_else(|_| BrowserConfig::default())
+        Ok(false)
+    }
 }
 
-pub fn save_config(config: &BrowserConfig) {
-    let path = get_config_path();
-    let json = serde_json::to_string_pretty(config).unwrap();
-    let mut file = fs::File::create(&path).unwrap();
+// Create (or truncate) a file and return a Writer to stream chunks into it.
+// With an offset the file is kept as it is and writing starts at that byte, which is how
+// resumed and multi-connection downloads fill in their part of a file.
+#[pyfunction]
+#[pyo3(signature = (file_name, offset=None))]
+pub fn open_writer(py: Python<'_>, file_name: &str, offset: Option<u64>) -> PyResult<Writer> {
+    let file = py
+        .allow_threads(|| match offset {
+            None => fs::File::create(file_name),
+            Some(offset) => {
+                let mut file = fs::OpenOptions::new().write(true).create(true).truncate(false).open(file_name)?;
+                file.seek(SeekFrom::Start(offset))?;
+
+                Ok(file)
+            }
+        })
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to create file: {}", e)))?;
+
+    Ok(Writer {
+        file: Some(BufWriter::with_capacity(WRITER_CAPACITY, file)),
+    })
+}
+
+// Read an HTML file on a worker thread (returns a concurrent.futures.Future of the contents)
+#[pyfunction]
+pub fn read_html_async<'py>(py: Python<'py>, file_name: String) -> PyResult<Bound<'py, PyAny>> {
+    tasks::executor(py)?.call_method1("submit", (wrap_pyfunction!(read_html, py)?, file_name))
+}
+
+// Write HTML contents to a file on a worker thread (returns a concurrent.futures.Future)
+#[pyfunction]
+pub fn write_html_async<'py>(py: Python<'py>, file_name: String, contents: String) -> PyResult<Bound<'py, PyAny>> {
+    tasks::executor(py)?.call_method1("submit", (wrap_pyfunction!(write_html, py)?, file_name, contents))
+}
+
+// Write a Python buffer to a file on a worker thread (returns a concurrent.futures.Future).
+// Writable buffers are copied first, so the caller is free to reuse them once this returns.
+#[pyfunction]
+pub fn write_bytes_async<'py>(py: Python<'py>, file_name: String, contents: Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let buffer = PyBuffer::<u8>::get(&contents)?;
+    let contents = if buffer.readonly() { contents } else { PyBytes::new(py, &buffer.to_vec(py)?).into_any() };
 
-    file.write_all(json.as_bytes()).unwrap();
+    tasks::executor(py)?.call_method1("submit", (wrap_pyfunction!(write_bytes, py)?, file_name, contents))
 }
@@ -1,2 +1,6 @@
 pub mod dirs;
 pub mod file_ops;
+pub mod processes;
+pub mod resources;
+pub mod store;
+pub mod tasks;
@@ -0,0 +1,65 @@
+use crate::system::tasks;
+use pyo3::prelude::*;
+use pyo3::{PyResult, pyfunction};
+use std::collections::HashMap;
+use std::sync::{LazyLock, Mutex};
+use sysinfo::{Pid, ProcessRefreshKind, ProcessesToUpdate, System};
+
+// Kept between samples so sysinfo only refreshes the processes it is asked about
+static SYSTEM: LazyLock<Mutex<System>> = LazyLock::new(|| Mutex::new(System::new()));
+
+// Get the resident memory of the given processes in bytes (as a Python dict '{pid, rss}').
+// Processes that no longer exist are left out.
+#[pyfunction]
+pub fn process_memory(py: Python<'_>, pids: Vec<u32>) -> PyResult<HashMap<u32, u64>> {
+    Ok(py.allow_threads(|| {
+        let pids: Vec<Pid> = pids.into_iter().map(Pid::from_u32).collect();
+        let mut system = SYSTEM.lock().unwrap_or_else(|e| e.into_inner());
+
+        system.refresh_processes_specifics(
+            ProcessesToUpdate::Some(&pids),
+            true,
+            ProcessRefreshKind::nothing().with_memory(),
+        );
+
+        pids.iter()
+            .filter_map(|pid| system.process(*pid).map(|process| (pid.as_u32(), process.memory())))
+            .collect()
+    }))
+}
+
+// Get the resident memory of the given processes on a worker thread (returns a concurrent.futures.Future of the dict)
+#[pyfunction]
+pub fn process_memory_async(py: Python<'_>, pids: Vec<u32>) -> PyResult<Bound<'_, PyAny>> {
+    tasks::executor(py)?.call_method1("submit", (wrap_pyfunction!(process_memory, py)?, pids))
+}
+
+// Get the resident memory in bytes and CPU usage in percent of the given processes (as a Python dict '{pid, (rss, cpu)}').
+// CPU usage is measured since the previous call, so the first sample of a process reads 0.
+#[pyfunction]
+pub fn process_usage(py: Python<'_>, pids: Vec<u32>) -> PyResult<HashMap<u32, (u64, f32)>> {
+    Ok(py.allow_threads(|| {
+        let pids: Vec<Pid> = pids.into_iter().map(Pid::from_u32).collect();
+        let mut system = SYSTEM.lock().unwrap_or_else(|e| e.into_inner());
+
+        system.refresh_processes_specifics(
+            ProcessesToUpdate::Some(&pids),
+            true,
+            ProcessRefreshKind::nothing().with_memory().with_cpu(),
+        );
+
+        pids.iter()
+            .filter_map(|pid| {
+                system
+                    .process(*pid)
+                    .map(|process| (pid.as_u32(), (process.memory(), process.cpu_usage())))
+            })
+            .collect()
+    }))
+}
+
+// Get the resident memory and CPU usage of the given processes on a worker thread (returns a concurrent.futures.Future of the dict)
+#[pyfunction]
+pub fn process_usage_async(py: Python<'_>, pids: Vec<u32>) -> PyResult<Bound<'_, PyAny>> {
+    tasks::executor(py)?.call_method1("submit", (wrap_pyfunction!(process_usage, py)?, pids))
+}
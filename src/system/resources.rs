@@ -0,0 +1,114 @@
+use crate::system::store::FileStamp;
+use pyo3::prelude::*;
+use pyo3::types::{PyBytes, PyString};
+use pyo3::{PyErr, PyResult, pyfunction};
+use std::collections::HashMap;
+use std::fs;
+use std::io;
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Arc, LazyLock, Mutex};
+use std::time::{Duration, Instant};
+
+// How long a cached resource is trusted before its mtime is looked at again
+const REVALIDATE_AFTER: Duration = Duration::from_secs(2);
+
+// A bundled file (page, stylesheet, icon) kept in memory after its first read. It is copied onto
+// the heap rather than mapped, the files are small and may be rewritten while Ibrowse runs.
+struct Resource {
+    contents: Vec<u8>,
+    utf8: bool,
+    stamp: Option<FileStamp>,
+}
+
+impl Resource {
+    fn load(path: &Path) -> io::Result<Resource> {
+        let stamp = FileStamp::of(path);
+        let contents = fs::read(path)?;
+        let utf8 = std::str::from_utf8(&contents).is_ok();
+
+        Ok(Resource { contents, utf8, stamp })
+    }
+
+    fn bytes(&self) -> &[u8] {
+        &self.contents
+    }
+
+    fn text(&self) -> Option<&str> {
+        // Validated once when the file was loaded
+        self.utf8.then(|| unsafe { std::str::from_utf8_unchecked(self.bytes()) })
+    }
+}
+
+struct Entry {
+    resource: Arc<Resource>,
+    checked: Instant,
+}
+
+static RESOURCES: LazyLock<Mutex<HashMap<PathBuf, Entry>>> = LazyLock::new(|| Mutex::new(HashMap::new()));
+static RESOURCE_HITS: AtomicU64 = AtomicU64::new(0);
+static RESOURCE_READS: AtomicU64 = AtomicU64::new(0);
+
+// Get a resource from the cache, reading it from disk only the first time or after it changed
+fn resource(path: &Path) -> io::Result<Arc<Resource>> {
+    {
+        let mut resources = RESOURCES.lock().unwrap_or_else(|e| e.into_inner());
+
+        if let Some(entry) = resources.get_mut(path) {
+            if entry.checked.elapsed() < REVALIDATE_AFTER || entry.resource.stamp == FileStamp::of(path) {
+                entry.checked = Instant::now();
+                RESOURCE_HITS.fetch_add(1, Ordering::Relaxed);
+
+                return Ok(entry.resource.clone());
+            }
+        }
+    }
+
+    RESOURCE_READS.fetch_add(1, Ordering::Relaxed);
+
+    let resource = Arc::new(Resource::load(path)?);
+    let entry = Entry {
+        resource: resource.clone(),
+        checked: Instant::now(),
+    };
+
+    RESOURCES.lock().unwrap_or_else(|e| e.into_inner()).insert(path.to_path_buf(), entry);
+
+    Ok(resource)
+}
+
+fn load_error(file_name: &str, e: io::Error) -> PyErr {
+    PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to read resource {}: {}", file_name, e))
+}
+
+// Get a bundled text file (page, stylesheet) as a Python string, cached in memory by path and mtime
+#[pyfunction]
+pub fn read_resource<'py>(py: Python<'py>, file_name: &str) -> PyResult<Bound<'py, PyString>> {
+    let resource = py.allow_threads(|| resource(Path::new(file_name))).map_err(|e| load_error(file_name, e))?;
+
+    match resource.text() {
+        Some(text) => Ok(PyString::new(py, text)),
+        None => Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+            "Resource {} is not valid UTF-8",
+            file_name
+        ))),
+    }
+}
+
+// Get a bundled binary file (icon, image) as Python bytes, cached in memory by path and mtime
+#[pyfunction]
+pub fn read_resource_bytes<'py>(py: Python<'py>, file_name: &str) -> PyResult<Bound<'py, PyBytes>> {
+    let resource = py.allow_threads(|| resource(Path::new(file_name))).map_err(|e| load_error(file_name, e))?;
+
+    Ok(PyBytes::new(py, resource.bytes()))
+}
+
+// Get the resource cache counters (as a Python dict '{hits, disk_reads}')
+#[pyfunction]
+pub fn resource_cache_stats() -> PyResult<HashMap<String, u64>> {
+    let mut stats = HashMap::new();
+    stats.insert("hits".to_string(), RESOURCE_HITS.load(Ordering::Relaxed));
+    stats.insert("disk_reads".to_string(), RESOURCE_READS.load(Ordering::Relaxed));
+
+    Ok(stats)
+}
@@ -0,0 +1,563 @@
+use pyo3::{PyErr, PyResult, Python, pyfunction};
+use serde::de::DeserializeOwned;
+use serde::{Deserialize, Serialize};
+use std::collections::HashMap;
+use std::fs;
+use std::io::{self, BufRead, BufReader, Seek, SeekFrom, Write};
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Condvar, LazyLock, Mutex, MutexGuard, Once};
+use std::thread;
+use std::time::{Duration, Instant, SystemTime};
+
+// One independently stored part of the browser data (passwords, bookmarks, ...).
+// Every mutation has to overwrite or remove a single value, so replaying a journal
+// that partially overlaps the snapshot still ends up in the same state.
+pub trait Record: Default + Clone + Serialize + DeserializeOwned + Send + 'static {
+    type Mutation: Serialize + DeserializeOwned + Send + 'static;
+
+    fn apply(&mut self, mutation: &Self::Mutation);
+}
+
+// Identifies one version of a file on disk
+#[derive(Clone, Copy, PartialEq, Debug)]
+pub(crate) struct FileStamp {
+    modified: SystemTime,
+    pub(crate) len: u64,
+}
+
+impl FileStamp {
+    pub(crate) fn of(path: &Path) -> Option<FileStamp> {
+        let metadata = fs::metadata(path).ok()?;
+
+        Some(FileStamp {
+            modified: metadata.modified().ok()?,
+            len: metadata.len(),
+        })
+    }
+}
+
+struct Paths {
+    snapshot: PathBuf,
+    journal: PathBuf,
+    temp: PathBuf,
+    lock: PathBuf,
+}
+
+impl Paths {
+    fn new(name: &str) -> Paths {
+        Paths {
+            snapshot: CONFIG_DIR.join(format!("{}.json", name)),
+            journal: CONFIG_DIR.join(format!("{}.journal", name)),
+            temp: CONFIG_DIR.join(format!("{}.json.tmp", name)),
+            lock: CONFIG_DIR.join(format!("{}.lock", name)),
+        }
+    }
+
+    fn stamps(&self) -> [Option<FileStamp>; 2] {
+        [FileStamp::of(&self.snapshot), FileStamp::of(&self.journal)]
+    }
+}
+
+// An advisory lock on a store's <name>.lock file, shared between all Ibrowse processes.
+// Writers hold it exclusively while appending or compacting, readers hold it shared
+// while loading, so nobody reads a half-written journal line.
+struct FileLock {
+    _file: fs::File,
+}
+
+impl FileLock {
+    fn open(path: &Path) -> io::Result<fs::File> {
+        fs::OpenOptions::new().create(true).truncate(false).write(true).open(path)
+    }
+
+    fn shared(path: &Path) -> io::Result<FileLock> {
+        let file = FileLock::open(path)?;
+        file.lock_shared()?;
+
+        Ok(FileLock { _file: file })
+    }
+
+    fn exclusive(path: &Path) -> io::Result<FileLock> {
+        let file = FileLock::open(path)?;
+        file.lock()?;
+
+        Ok(FileLock { _file: file })
+    }
+}
+
+struct State<T: Record> {
+    record: Option<T>,
+    stamps: [Option<FileStamp>; 2],
+    // Transactions applied in memory that are not in the journal yet
+    pending: Vec<Vec<T::Mutation>>,
+    // Number of mutations in the journal on top of the snapshot
+    journal_len: usize,
+    // How much of the journal has been replayed into the record
+    journal_offset: u64,
+}
+
+// A record kept in memory and persisted as a snapshot (<name>.json) plus a journal of
+// transactions (<name>.journal). It is read from disk on first access and again only
+// when one of its files changes, which may also be another Ibrowse process writing to it.
+pub struct Store<T: Record> {
+    paths: Paths,
+    state: Mutex<State<T>>,
+    // Serializes disk writes between the writer thread and explicit flushes
+    write_lock: Mutex<()>,
+    registered: Once,
+}
+
+// Something the writer thread can persist
+trait Persist: Sync {
+    fn flush(&self) -> io::Result<()>;
+}
+
+struct Writer {
+    stores: Mutex<Vec<&'static dyn Persist>>,
+    dirty: Mutex<bool>,
+    changed: Condvar,
+    // Bumped on every transaction so the writer can tell when things have gone quiet
+    generation: AtomicU64,
+    started: Once,
+}
+
+static WRITER: Writer = Writer {
+    stores: Mutex::new(Vec::new()),
+    dirty: Mutex::new(false),
+    changed: Condvar::new(),
+    generation: AtomicU64::new(0),
+    started: Once::new(),
+};
+static CACHE_HITS: AtomicU64 = AtomicU64::new(0);
+static CACHE_MISSES: AtomicU64 = AtomicU64::new(0);
+static MIGRATION: Once = Once::new();
+
+// How long the stores have to be left alone before pending changes are written
+const WRITE_DELAY: Duration = Duration::from_millis(500);
+// Upper bound on how long a change may stay unwritten under constant mutation
+const MAX_WRITE_DELAY: Duration = Duration::from_secs(5);
+// Journal length at which it is folded back into a fresh snapshot
+const COMPACT_AFTER: usize = 1000;
+
+static CONFIG_DIR: LazyLock<PathBuf> = LazyLock::new(|| {
+    let config_dir = dirs::config_dir()
+        .unwrap_or_else(|| std::env::temp_dir())
+        .join("ibrowse");
+
+    fs::create_dir_all(&config_dir).expect("Failed to create config dir");
+
+    config_dir
+});
+
+fn lock<T>(mutex: &Mutex<T>) -> MutexGuard<'_, T> {
+    mutex.lock().unwrap_or_else(|e| e.into_inner())
+}
+
+fn load_snapshot<T: Record>(paths: &Paths) -> T {
+    let contents = match fs::read_to_string(&paths.snapshot) {
+        Ok(contents) => contents,
+        Err(_) => return T::default(),
+    };
+
+    serde_json::from_str(&contents).unwrap_or_else(|e| {
+        // Keep the unreadable file around instead of overwriting it on the next compaction
+        let corrupt = paths.snapshot.with_extension("json.corrupt");
+        eprintln!("Failed to parse {}, moving it to {}: {}", paths.snapshot.display(), corrupt.display(), e);
+        let _ = fs::rename(&paths.snapshot, &corrupt);
+
+        T::default()
+    })
+}
+
+// Replay the journal from the given offset on top of a record, returning the number of mutations
+// applied and where the journal ends. A complete line that can't be read (a mutation added by a newer
+// Ibrowse, say) is skipped and the lines after it still count. Only a torn last line without its newline,
+// left behind by a crash, is cut off so later appends start on a clean line; the caller holds the
+// store's file lock, so nobody is still writing it.
+fn replay_journal<T: Record>(paths: &Paths, record: &mut T, offset: u64) -> (usize, u64) {
+    let mut file = match fs::File::open(&paths.journal) {
+        Ok(file) => file,
+        Err(_) => return (0, 0),
+    };
+
+    if file.seek(SeekFrom::Start(offset)).is_err() {
+        return (0, offset);
+    }
+
+    let mut reader = BufReader::new(file);
+    let mut line = Vec::new();
+    let mut valid_len = offset;
+    let mut count = 0;
+    let mut torn = false;
+
+    loop {
+        line.clear();
+
+        match reader.read_until(b'\n', &mut line) {
+            Ok(0) | Err(_) => break,
+            Ok(_) if !line.ends_with(b"\n") => {
+                torn = true;
+                break;
+            }
+            Ok(read) => {
+                match serde_json::from_slice::<Vec<T::Mutation>>(&line) {
+                    Ok(transaction) => {
+                        for mutation in &transaction {
+                            record.apply(mutation);
+                        }
+
+                        count += transaction.len();
+                    }
+                    Err(e) => eprintln!("Skipping an unreadable transaction in {}: {}", paths.journal.display(), e),
+                }
+
+                valid_len += read as u64;
+            }
+        }
+    }
+
+    if torn {
+        eprintln!("Discarding a torn last line of {}", paths.journal.display());
+
+        if let Ok(file) = fs::OpenOptions::new().write(true).open(&paths.journal) {
+            let _ = file.set_len(valid_len);
+        }
+    }
+
+    (count, valid_len)
+}
+
+// Append transactions to the journal, one JSON line each
+fn append_journal<M: Serialize>(paths: &Paths, transactions: &[Vec<M>]) -> io::Result<()> {
+    let mut lines = String::new();
+
+    for transaction in transactions {
+        lines.push_str(&serde_json::to_string(transaction)?);
+        lines.push('\n');
+    }
+
+    let mut file = fs::OpenOptions::new().create(true).append(true).open(&paths.journal)?;
+    file.write_all(lines.as_bytes())?;
+    file.sync_data()
+}
+
+// Write a full snapshot to a temp file and atomically swap it in, then empty the journal
+fn write_snapshot<T: Serialize>(paths: &Paths, record: &T) -> io::Result<()> {
+    let json = serde_json::to_string_pretty(record)?;
+    let mut file = fs::File::create(&paths.temp)?;
+    file.write_all(json.as_bytes())?;
+    file.sync_all()?;
+
+    fs::rename(&paths.temp, &paths.snapshot)?;
+
+    #[cfg(unix)]
+    fs::File::open(&*CONFIG_DIR)?.sync_all()?;
+
+    fs::OpenOptions::new().create(true).write(true).truncate(true).open(&paths.journal)?;
+
+    Ok(())
+}
+
+impl<T: Record> Store<T> {
+    pub fn new(name: &str) -> Store<T> {
+        Store {
+            paths: Paths::new(name),
+            state: Mutex::new(State {
+                record: None,
+                stamps: [None, None],
+                pending: Vec::new(),
+                journal_len: 0,
+                journal_offset: 0,
+            }),
+            write_lock: Mutex::new(()),
+            registered: Once::new(),
+        }
+    }
+
+    // Bring the record up to date with its files. When only the journal grew, just the new
+    // transactions are replayed. Pending changes of this process are applied again on top,
+    // so they win over older changes made by other processes. Callers hold the file lock.
+    fn refresh(&self, state: &mut State<T>) {
+        let stamps = self.paths.stamps();
+
+        if state.record.is_some() && state.stamps == stamps {
+            return;
+        }
+
+        let journal_size = stamps[1].map_or(0, |stamp| stamp.len);
+
+        match state.record.as_mut() {
+            Some(record) if state.stamps[0] == stamps[0] && journal_size >= state.journal_offset => {
+                let (count, end) = replay_journal(&self.paths, record, state.journal_offset);
+                state.journal_len += count;
+                state.journal_offset = end;
+            }
+            _ => {
+                let mut record = load_snapshot(&self.paths);
+                let (count, end) = replay_journal(&self.paths, &mut record, 0);
+                state.record = Some(record);
+                state.journal_len = count;
+                state.journal_offset = end;
+            }
+        }
+
+        let record = state.record.as_mut().unwrap();
+
+        for transaction in &state.pending {
+            for mutation in transaction {
+                record.apply(mutation);
+            }
+        }
+
+        state.stamps = self.paths.stamps();
+    }
+
+    // Lock the in-memory state, reloading it first if its files changed on disk
+    fn current(&self) -> MutexGuard<'_, State<T>> {
+        let state = lock(&self.state);
+
+        if state.record.is_some() && state.stamps == self.paths.stamps() {
+            CACHE_HITS.fetch_add(1, Ordering::Relaxed);
+            return state;
+        }
+
+        drop(state);
+        CACHE_MISSES.fetch_add(1, Ordering::Relaxed);
+        MIGRATION.call_once(migrate_legacy_config);
+
+        // The file lock is always taken before the state lock
+        let _shared = FileLock::shared(&self.paths.lock);
+        let mut state = lock(&self.state);
+        self.refresh(&mut state);
+
+        state
+    }
+
+    // Run a closure against the cached record without touching its files
+    pub fn read<R>(&self, f: impl FnOnce(&T) -> R) -> R {
+        let state = self.current();
+
+        f(state.record.as_ref().unwrap())
+    }
+
+    // Apply a mutation in memory and hand it to the writer thread to journal later
+    pub fn apply(&'static self, mutation: T::Mutation) {
+        self.apply_all(vec![mutation]);
+    }
+
+    // Apply several mutations as one transaction, journaled as a single line
+    pub fn apply_all(&'static self, transaction: Vec<T::Mutation>) {
+        if transaction.is_empty() {
+            return;
+        }
+
+        let mut state = self.current();
+        let record = state.record.as_mut().unwrap();
+
+        for mutation in &transaction {
+            record.apply(mutation);
+        }
+
+        state.pending.push(transaction);
+        drop(state);
+
+        self.registered.call_once(|| lock(&WRITER.stores).push(self));
+        WRITER.notify();
+    }
+}
+
+impl<T: Record> Persist for Store<T> {
+    // Append pending transactions to the journal, compacting it into a new snapshot once it grows too long.
+    // Whatever other processes wrote in the meantime is merged in first, so their records are kept.
+    fn flush(&self) -> io::Result<()> {
+        let _write = lock(&self.write_lock);
+
+        if lock(&self.state).pending.is_empty() {
+            return Ok(());
+        }
+
+        let _exclusive = FileLock::exclusive(&self.paths.lock)?;
+
+        let (transactions, changes, snapshot) = {
+            let mut state = lock(&self.state);
+            self.refresh(&mut state);
+
+            if state.pending.is_empty() {
+                return Ok(());
+            }
+
+            // The snapshot is taken together with the transactions, so it holds exactly what the journal would
+            let transactions = std::mem::take(&mut state.pending);
+            let changes: usize = transactions.iter().map(Vec::len).sum();
+            let snapshot = if state.journal_len + changes > COMPACT_AFTER || state.stamps[0].is_none() {
+                state.record.clone()
+            } else {
+                None
+            };
+
+            (transactions, changes, snapshot)
+        };
+
+        let result = match &snapshot {
+            Some(record) => write_snapshot(&self.paths, record),
+            None => append_journal(&self.paths, &transactions),
+        };
+
+        let mut state = lock(&self.state);
+
+        match result {
+            Ok(()) => {
+                state.journal_len = match snapshot {
+                    Some(_) => 0,
+                    None => state.journal_len + changes,
+                };
+                state.stamps = self.paths.stamps();
+                state.journal_offset = state.stamps[1].map_or(0, |stamp| stamp.len);
+            }
+            Err(_) => {
+                let newer = std::mem::replace(&mut state.pending, transactions);
+                state.pending.extend(newer);
+            }
+        }
+
+        result
+    }
+}
+
+impl Writer {
+    fn notify(&'static self) {
+        self.generation.fetch_add(1, Ordering::Relaxed);
+        *lock(&self.dirty) = true;
+
+        self.started.call_once(|| {
+            thread::Builder::new()
+                .name("ibrowse-config-writer".to_string())
+                .spawn(|| WRITER.run())
+                .expect("Failed to start the config writer");
+        });
+        self.changed.notify_one();
+    }
+
+    fn flush_all(&self) -> io::Result<()> {
+        let stores = lock(&self.stores).clone();
+        let mut result = Ok(());
+
+        for store in stores {
+            if let Err(e) = store.flush() {
+                result = Err(e);
+            }
+        }
+
+        result
+    }
+
+    fn run(&self) {
+        loop {
+            {
+                let mut dirty = lock(&self.dirty);
+
+                while !*dirty {
+                    dirty = self.changed.wait(dirty).unwrap_or_else(|e| e.into_inner());
+                }
+
+                *dirty = false;
+            }
+
+            let started = Instant::now();
+
+            loop {
+                let generation = self.generation.load(Ordering::Relaxed);
+                thread::sleep(WRITE_DELAY);
+
+                if self.generation.load(Ordering::Relaxed) == generation || started.elapsed() >= MAX_WRITE_DELAY {
+                    break;
+                }
+            }
+
+            if let Err(e) = self.flush_all() {
+                eprintln!("Failed to write config: {}", e);
+                *lock(&self.dirty) = true;
+                thread::sleep(MAX_WRITE_DELAY);
+            }
+        }
+    }
+}
+
+// The single config.json used before the stores were split up
+#[derive(Deserialize, Default)]
+#[serde(default)]
+struct LegacyConfig {
+    passwords: HashMap<String, [String; 2]>,
+    bookmarks: HashMap<String, String>,
+    previous_tabs: Vec<String>,
+    preferred_browser: String,
+    smooth_scrolling: bool,
+}
+
+// Split an old config.json into the per-store snapshots, once. Stores that already
+// have a snapshot are left alone, so an interrupted migration simply resumes.
+fn migrate_legacy_config() {
+    let legacy_path = CONFIG_DIR.join("config.json");
+
+    let contents = match fs::read_to_string(&legacy_path) {
+        Ok(contents) => contents,
+        Err(_) => return,
+    };
+
+    let legacy: LegacyConfig = match serde_json::from_str(&contents) {
+        Ok(legacy) => legacy,
+        Err(e) => {
+            eprintln!("Failed to parse {}, not migrating it: {}", legacy_path.display(), e);
+            return;
+        }
+    };
+
+    let settings = serde_json::json!({
+        "preferred_browser": legacy.preferred_browser,
+        "smooth_scrolling": legacy.smooth_scrolling,
+    });
+    let session = serde_json::json!({ "tabs": legacy.previous_tabs });
+
+    let migrated = [
+        write_migrated(&Paths::new("passwords"), &legacy.passwords),
+        write_migrated(&Paths::new("bookmarks"), &legacy.bookmarks),
+        write_migrated(&Paths::new("session"), &session),
+        write_migrated(&Paths::new("settings"), &settings),
+    ];
+
+    if let Some(Err(e)) = migrated.into_iter().find(Result::is_err) {
+        eprintln!("Failed to migrate {}: {}", legacy_path.display(), e);
+        return;
+    }
+
+    let _ = fs::rename(&legacy_path, CONFIG_DIR.join("config.json.migrated"));
+}
+
+fn write_migrated<T: Serialize>(paths: &Paths, record: &T) -> io::Result<()> {
+    let _exclusive = FileLock::exclusive(&paths.lock)?;
+
+    if paths.snapshot.exists() {
+        return Ok(());
+    }
+
+    write_snapshot(paths, record)
+}
+
+// Write any pending config changes to disk right away
+#[pyfunction]
+pub fn flush(py: Python<'_>) -> PyResult<()> {
+    py.allow_threads(|| WRITER.flush_all()).map_err(|e| {
+        PyErr::new::<pyo3::exceptions::PyIOError, _>(format!("Failed to write config: {}", e))
+    })
+}
+
+// Get the config cache counters (as a Python dict '{hits, misses}')
+#[pyfunction]
+pub fn config_cache_stats() -> PyResult<HashMap<String, u64>> {
+    let mut stats = HashMap::new();
+    stats.insert("hits".to_string(), CACHE_HITS.load(Ordering::Relaxed));
+    stats.insert("misses".to_string(), CACHE_MISSES.load(Ordering::Relaxed));
+
+    Ok(stats)
+}
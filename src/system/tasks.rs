@@ -0,0 +1,27 @@
+use pyo3::prelude::*;
+use pyo3::sync::GILOnceCell;
+use pyo3::types::PyDict;
+
+// Number of threads behind the *_async functions
+const WORKERS: usize = 4;
+
+static EXECUTOR: GILOnceCell<Py<PyAny>> = GILOnceCell::new();
+
+// The concurrent.futures.ThreadPoolExecutor the *_async functions submit their work to.
+// The functions they run release the GIL, so the pool really works in parallel.
+pub fn executor(py: Python<'_>) -> PyResult<&Bound<'_, PyAny>> {
+    let executor = EXECUTOR.get_or_try_init(py, || -> PyResult<Py<PyAny>> {
+        let kwargs = PyDict::new(py);
+        kwargs.set_item("max_workers", WORKERS)?;
+        kwargs.set_item("thread_name_prefix", "ibrowse-io")?;
+
+        let executor = py
+            .import("concurrent.futures")?
+            .getattr("ThreadPoolExecutor")?
+            .call((), Some(&kwargs))?;
+
+        Ok(executor.unbind())
+    })?;
+
+    Ok(executor.bind(py))
+}
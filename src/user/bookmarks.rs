@@ -1,22 +1,80 @@
-use pyo3::{pyfunction, PyResult};
-use crate::system;
+use pyo3::{pyfunction, PyResult, Python};
+use serde::{Deserialize, Serialize};
+use std::collections::HashMap;
+use std::sync::LazyLock;
+use crate::system::store::{Record, Store};
 
-// Append a bookmark object with url and bookmark name to config.json
+// Bookmarks, stored in bookmarks.json as '{url: name}'
+#[derive(Serialize, Deserialize, Default, Clone)]
+#[serde(transparent)]
+pub struct Bookmarks(pub HashMap<String, String>);
+
+#[derive(Serialize, Deserialize)]
+#[serde(tag = "op", rename_all = "snake_case")]
+pub enum BookmarkMutation {
+    Add { url: String, name: String },
+    Remove { url: String },
+}
+
+impl Record for Bookmarks {
+    type Mutation = BookmarkMutation;
+
+    fn apply(&mut self, mutation: &BookmarkMutation) {
+        match mutation {
+            BookmarkMutation::Add { url, name } => {
+                self.0.insert(url.clone(), name.clone());
+            }
+            BookmarkMutation::Remove { url } => {
+                self.0.remove(url);
+            }
+        }
+    }
+}
+
+pub static BOOKMARKS: LazyLock<Store<Bookmarks>> = LazyLock::new(|| Store::new("bookmarks"));
+
+// Append a bookmark object with url and bookmark name to bookmarks.json
+#[pyfunction]
+pub fn add_bookmark(py: Python<'_>, url: &str, name: &str) -> PyResult<()> {
+    let mutation = BookmarkMutation::Add {
+        url: url.to_string(),
+        name: name.to_string(),
+    };
+
+    py.allow_threads(|| BOOKMARKS.apply(mutation));
+
+    Ok(())
+}
+
+// Remove a bookmark object with the specified bookmark name from bookmarks.json
 #[pyfunction]
-pub fn add_bookmark(url: &str, name: &str) -> PyResult<()> {
-    let mut config = system::file_ops::load_config();
-    config.bookmarks.insert(url.to_string(), name.to_string());
+pub fn remove_bookmark(py: Python<'_>, name: &str) -> PyResult<()> {
+    let mutation = BookmarkMutation::Remove { url: name.to_string() };
+
+    py.allow_threads(|| BOOKMARKS.apply(mutation));
 
-    system::file_ops::save_config(&config);
     Ok(())
 }
 
-// Remove a bookmark object with the specified bookmark name from config.json
+// Append many bookmark objects ('[(url, name)]') to bookmarks.json in one go
 #[pyfunction]
-pub fn remove_bookmark(name: &str) -> PyResult<()> {
-    let mut config = system::file_ops::load_config();
-    config.bookmarks.remove(name);
+pub fn add_bookmarks(py: Python<'_>, bookmarks: Vec<(String, String)>) -> PyResult<()> {
+    let mutations = bookmarks
+        .into_iter()
+        .map(|(url, name)| BookmarkMutation::Add { url, name })
+        .collect();
+
+    py.allow_threads(|| BOOKMARKS.apply_all(mutations));
 
-    system::file_ops::save_config(&config);
     Ok(())
-}
\ No newline at end of file
+}
+
+// Remove the bookmark objects with the specified urls ('[url]') from bookmarks.json in one go
+#[pyfunction]
+pub fn remove_bookmarks(py: Python<'_>, urls: Vec<String>) -> PyResult<()> {
+    let mutations = urls.into_iter().map(|url| BookmarkMutation::Remove { url }).collect();
+
+    py.allow_threads(|| BOOKMARKS.apply_all(mutations));
+
+    Ok(())
+}
@@ -1,43 +1,129 @@
-use crate::system;
+use crate::system::tasks;
+use crate::user::bookmarks::BOOKMARKS;
+use crate::user::passwords::PASSWORDS;
+use crate::user::settings::{SESSION, SETTINGS};
+use pyo3::prelude::*;
 use pyo3::{PyResult, pyfunction};
-use std::collections::HashMap;
+use std::collections::{BTreeMap, HashMap};
+use std::ops::Bound::{Excluded, Unbounded};
 
 // Get passwords (as a Python dict '{url, [username, password]}')
 #[pyfunction]
-pub fn passwords() -> PyResult<HashMap<String, [String; 2]>> {
-    let config = system::file_ops::load_config();
+pub fn passwords(py: Python<'_>) -> PyResult<BTreeMap<String, [String; 2]>> {
+    Ok(py.allow_threads(|| PASSWORDS.read(|passwords| passwords.entries.clone())))
+}
+
+// Get up to count saved urls in order, starting after the given url (as a Python list '[url]'),
+// so long password lists are read a page at a time
+#[pyfunction]
+#[pyo3(signature = (after, count))]
+pub fn password_urls(py: Python<'_>, after: Option<&str>, count: usize) -> PyResult<Vec<String>> {
+    let start = after.map_or(Unbounded, Excluded);
 
-    Ok(config.passwords)
+    Ok(py.allow_threads(|| {
+        PASSWORDS.read(|passwords| {
+            passwords
+                .entries
+                .range::<str, _>((start, Unbounded))
+                .take(count)
+                .map(|(url, _)| url.clone())
+                .collect()
+        })
+    }))
 }
 
-// Get bookmarks (as a Python dict '{url, name}')
+// Get the username and password saved under exactly this url (as a Python tuple '(username, password)' or None)
 #[pyfunction]
-pub fn bookmarks() -> PyResult<HashMap<String, String>> {
-    let config = system::file_ops::load_config();
+pub fn password(py: Python<'_>, url: &str) -> PyResult<Option<(String, String)>> {
+    Ok(py.allow_threads(|| {
+        PASSWORDS.read(|passwords| {
+            passwords
+                .entries
+                .get(url)
+                .map(|[username, password]| (username.clone(), password.clone()))
+        })
+    }))
+}
 
-    Ok(config.bookmarks)
+// Get the username and password saved for the page at a url (as a Python tuple '(username, password)' or None).
+// Saved urls with the same path win, then the longest parent path, then the same origin. Unless 'same_origin'
+// is set, a url saved for the same host under another scheme or port is taken last.
+#[pyfunction]
+#[pyo3(signature = (url, same_origin=false))]
+pub fn lookup_credentials(py: Python<'_>, url: &str, same_origin: bool) -> PyResult<Option<(String, String)>> {
+    Ok(py.allow_threads(|| {
+        PASSWORDS.read(|passwords| {
+            passwords
+                .lookup(url, same_origin)
+                .map(|[username, password]| (username.clone(), password.clone()))
+        })
+    }))
 }
 
-// Get previous tabs (as a Python list '[url]')
+// Get bookmarks (as a Python dict '{url, name}')
 #[pyfunction]
-pub fn previous_tabs() -> PyResult<Vec<String>> {
-    let config = system::file_ops::load_config();
+pub fn bookmarks(py: Python<'_>) -> PyResult<HashMap<String, String>> {
+    Ok(py.allow_threads(|| BOOKMARKS.read(|bookmarks| bookmarks.0.clone())))
+}
 
-    Ok(config.previous_tabs)
+// Get previous tabs (as a Python list '[(url, title, last_active)]')
+#[pyfunction]
+pub fn previous_tabs(py: Python<'_>) -> PyResult<Vec<(String, String, f64)>> {
+    Ok(py.allow_threads(|| {
+        SESSION.read(|session| {
+            session
+                .tabs
+                .iter()
+                .map(|tab| (tab.url.clone(), tab.title.clone(), tab.last_active))
+                .collect()
+        })
+    }))
 }
 
 // Get preferred browser (as a Python string '[browser_name]')
 #[pyfunction]
-pub fn preferred_browser() -> PyResult<String> {
-    let config = system::file_ops::load_config();
-
-    Ok(config.preferred_browser)
+pub fn preferred_browser(py: Python<'_>) -> PyResult<String> {
+    Ok(py.allow_threads(|| SETTINGS.read(|settings| settings.preferred_browser.clone())))
 }
 
 // Get smooth scrolling enabled
 #[pyfunction]
-pub fn smooth_scrolling_enabled() -> PyResult<bool> {
-    let config = system::file_ops::load_config();
+pub fn smooth_scrolling_enabled(py: Python<'_>) -> PyResult<bool> {
+    Ok(py.allow_threads(|| SETTINGS.read(|settings| settings.smooth_scrolling)))
+}
+
+// Get how many of the most recently used tabs are loaded straight away on restore
+#[pyfunction]
+pub fn eager_restore_count(py: Python<'_>) -> PyResult<usize> {
+    Ok(py.allow_threads(|| SETTINGS.read(|settings| settings.eager_restore_count)))
+}
 
-    Ok(config.smooth_scrolling)
+// Get how many seconds a background tab stays idle before it is frozen
+#[pyfunction]
+pub fn freeze_after(py: Python<'_>) -> PyResult<u64> {
+    Ok(py.allow_threads(|| SETTINGS.read(|settings| settings.freeze_after)))
+}
+
+// Get how many seconds a background tab stays idle before it is discarded
+#[pyfunction]
+pub fn discard_after(py: Python<'_>) -> PyResult<u64> {
+    Ok(py.allow_threads(|| SETTINGS.read(|settings| settings.discard_after)))
+}
+
+// Get how many megabytes all renderer processes together may use before tabs get discarded
+#[pyfunction]
+pub fn memory_budget(py: Python<'_>) -> PyResult<u64> {
+    Ok(py.allow_threads(|| SETTINGS.read(|settings| settings.memory_budget)))
+}
+
+// Get passwords on a worker thread (returns a concurrent.futures.Future of the dict)
+#[pyfunction]
+pub fn passwords_async(py: Python<'_>) -> PyResult<Bound<'_, PyAny>> {
+    tasks::executor(py)?.call_method1("submit", (wrap_pyfunction!(passwords, py)?,))
+}
+
+// Get bookmarks on a worker thread (returns a concurrent.futures.Future of the dict)
+#[pyfunction]
+pub fn bookmarks_async(py: Python<'_>) -> PyResult<Bound<'_, PyAny>> {
+    tasks::executor(py)?.call_method1("submit", (wrap_pyfunction!(bookmarks, py)?,))
 }
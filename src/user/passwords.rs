@@ -1,23 +1,205 @@
-use pyo3::{pyfunction, PyResult};
-use crate::system;
+use pyo3::{pyfunction, PyResult, Python};
+use serde::{Deserialize, Serialize, Serializer};
+use std::collections::BTreeMap;
+use std::sync::LazyLock;
+use crate::system::store::{Record, Store};
 
-// Append a password object with url, username, and password to config.json
+// Saved passwords, stored in passwords.json as '{url: [username, password]}'. The entries are
+// kept in url order so the password manager can page through them. The index is rebuilt when
+// the file is loaded and kept up to date by every mutation.
+#[derive(Deserialize, Default, Clone)]
+#[serde(from = "BTreeMap<String, [String; 2]>")]
+pub struct Passwords {
+    pub entries: BTreeMap<String, [String; 2]>,
+    index: PasswordIndex,
+}
+
+// The saved urls ordered by normalized '(host, origin, path)', so the best match for a page
+// is found with a few ordered lookups instead of a scan
+#[derive(Default, Clone)]
+struct PasswordIndex {
+    paths: BTreeMap<(String, String, String), Vec<String>>,
+}
+
+// Split a url into its lowercased host, its origin ('scheme://host' with any port that isn't the
+// scheme's default) and its path without trailing slashes. The query and fragment are ignored and
+// urls without a scheme are taken as https, so 'Example.com:443/login/' is
+// ('example.com', 'https://example.com', '/login').
+fn normalize(url: &str) -> (String, String, String) {
+    let (scheme, rest) = url.split_once("://").unwrap_or(("https", url));
+    let scheme = scheme.to_lowercase();
+    let end = rest.find(['/', '?', '#']).unwrap_or(rest.len());
+    let authority = rest[..end].rsplit_once('@').map_or(&rest[..end], |(_, authority)| authority).to_lowercase();
+    let path = rest[end..].split(['?', '#']).next().unwrap_or("").trim_end_matches('/');
+
+    // The port follows the last colon, unless that colon is inside an IPv6 address
+    let (host, port) = match authority.rsplit_once(':') {
+        Some((host, port)) if (!host.contains(':') || host.ends_with(']')) && port.bytes().all(|b| b.is_ascii_digit()) => (host, port),
+        _ => (authority.as_str(), ""),
+    };
+
+    let origin = match (scheme.as_str(), port) {
+        (_, "") | ("http", "80") | ("https", "443") => format!("{scheme}://{host}"),
+        _ => format!("{scheme}://{host}:{port}"),
+    };
+
+    (host.to_string(), origin, path.to_string())
+}
+
+impl PasswordIndex {
+    fn insert(&mut self, url: &str) {
+        self.paths.entry(normalize(url)).or_default().push(url.to_string());
+    }
+
+    fn remove(&mut self, url: &str) {
+        let key = normalize(url);
+
+        if let Some(urls) = self.paths.get_mut(&key) {
+            urls.retain(|saved| saved != url);
+
+            if urls.is_empty() {
+                self.paths.remove(&key);
+            }
+        }
+    }
+
+    // The saved url that fits a page best: the same path, then the longest saved parent path, then
+    // anything else on the same origin. Unless 'same_origin' is set, a url saved for the same host
+    // under another scheme or port is taken last. Other hosts never match, even on the same domain,
+    // as hosting services give every site its own subdomain ('github.io', 'herokuapp.com').
+    fn lookup(&self, url: &str, same_origin: bool) -> Option<&str> {
+        let mut key = normalize(url);
+
+        loop {
+            if let Some(urls) = self.paths.get(&key) {
+                return urls.last().map(String::as_str);
+            }
+
+            match key.2.rfind('/') {
+                Some(end) => key.2.truncate(end),
+                None => break,
+            }
+        }
+
+        let (host, origin, _) = key;
+
+        if let Some((_, urls)) = self.paths
+            .range((host.clone(), origin.clone(), String::new())..)
+            .next()
+            .filter(|((saved_host, saved_origin, _), _)| *saved_host == host && *saved_origin == origin)
+        {
+            return urls.last().map(String::as_str);
+        }
+
+        if same_origin {
+            return None;
+        }
+
+        self.paths
+            .range((host.clone(), String::new(), String::new())..)
+            .next()
+            .filter(|((saved_host, _, _), _)| *saved_host == host)
+            .and_then(|(_, urls)| urls.last().map(String::as_str))
+    }
+}
+
+impl Passwords {
+    // The username and password saved for the page at a url, if any fits
+    pub fn lookup(&self, url: &str, same_origin: bool) -> Option<&[String; 2]> {
+        self.index.lookup(url, same_origin).and_then(|saved| self.entries.get(saved))
+    }
+}
+
+impl From<BTreeMap<String, [String; 2]>> for Passwords {
+    fn from(entries: BTreeMap<String, [String; 2]>) -> Passwords {
+        let mut index = PasswordIndex::default();
+
+        for url in entries.keys() {
+            index.insert(url);
+        }
+
+        Passwords { entries, index }
+    }
+}
+
+// Only the entries are written, the index is derived from them
+impl Serialize for Passwords {
+    fn serialize<S: Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        self.entries.serialize(serializer)
+    }
+}
+
+#[derive(Serialize, Deserialize)]
+#[serde(tag = "op", rename_all = "snake_case")]
+pub enum PasswordMutation {
+    Add { url: String, username: String, password: String },
+    Remove { url: String },
+}
+
+impl Record for Passwords {
+    type Mutation = PasswordMutation;
+
+    fn apply(&mut self, mutation: &PasswordMutation) {
+        match mutation {
+            PasswordMutation::Add { url, username, password } => {
+                if self.entries.insert(url.clone(), [username.clone(), password.clone()]).is_none() {
+                    self.index.insert(url);
+                }
+            }
+            PasswordMutation::Remove { url } => {
+                if self.entries.remove(url).is_some() {
+                    self.index.remove(url);
+                }
+            }
+        }
+    }
+}
+
+pub static PASSWORDS: LazyLock<Store<Passwords>> = LazyLock::new(|| Store::new("passwords"));
+
+// Append a password object with url, username, and password to passwords.json
 #[pyfunction]
-pub fn add_password(url: &str, username: &str, password: &str) -> PyResult<()> {
-    let mut config = system::file_ops::load_config();
-    let array = [username.to_string(), password.to_string()];
-    config.passwords.insert(url.to_string(), array);
+pub fn add_password(py: Python<'_>, url: &str, username: &str, password: &str) -> PyResult<()> {
+    let mutation = PasswordMutation::Add {
+        url: url.to_string(),
+        username: username.to_string(),
+        password: password.to_string(),
+    };
+
+    py.allow_threads(|| PASSWORDS.apply(mutation));
 
-    system::file_ops::save_config(&config);
     Ok(())
 }
 
-// Remove a password object with specified url from config.json
+// Remove a password object with specified url from passwords.json
 #[pyfunction]
-pub fn remove_password(url: &str) -> PyResult<()> {
-    let mut config = system::file_ops::load_config();
-    config.passwords.remove(url);
+pub fn remove_password(py: Python<'_>, url: &str) -> PyResult<()> {
+    let mutation = PasswordMutation::Remove { url: url.to_string() };
+
+    py.allow_threads(|| PASSWORDS.apply(mutation));
 
-    system::file_ops::save_config(&config);
     Ok(())
-}
\ No newline at end of file
+}
+
+// Append many password objects ('[(url, username, password)]') to passwords.json in one go
+#[pyfunction]
+pub fn add_passwords(py: Python<'_>, passwords: Vec<(String, String, String)>) -> PyResult<()> {
+    let mutations = passwords
+        .into_iter()
+        .map(|(url, username, password)| PasswordMutation::Add { url, username, password })
+        .collect();
+
+    py.allow_threads(|| PASSWORDS.apply_all(mutations));
+
+    Ok(())
+}
+
+// Remove the password objects with the specified urls ('[url]') from passwords.json in one go
+#[pyfunction]
+pub fn remove_passwords(py: Python<'_>, urls: Vec<String>) -> PyResult<()> {
+    let mutations = urls.into_iter().map(|url| PasswordMutation::Remove { url }).collect();
+
+    py.allow_threads(|| PASSWORDS.apply_all(mutations));
+
+    Ok(())
+}
@@ -1,32 +1,174 @@
-use pyo3::{pyfunction, PyResult};
-use crate::system::file_ops;
+use pyo3::{pyfunction, PyResult, Python};
+use serde::{Deserialize, Serialize};
+use std::sync::LazyLock;
+use crate::system::store::{Record, Store};
 
-// Set the previous tabs array to a Python list ('[url]')
+// Scalar preferences, stored in settings.json
+#[derive(Serialize, Deserialize, Clone)]
+#[serde(default)]
+pub struct Settings {
+    pub preferred_browser: String,
+    pub smooth_scrolling: bool,
+    pub eager_restore_count: usize,
+    pub freeze_after: u64,
+    pub discard_after: u64,
+    pub memory_budget: u64,
+}
+
+impl Default for Settings {
+    fn default() -> Self {
+        Settings {
+            preferred_browser: String::new(),
+            smooth_scrolling: false,
+            eager_restore_count: 0,
+            freeze_after: 5 * 60,
+            discard_after: 30 * 60,
+            memory_budget: 4096,
+        }
+    }
+}
+
+#[derive(Serialize, Deserialize)]
+#[serde(tag = "op", rename_all = "snake_case")]
+pub enum SettingsMutation {
+    SetPreferredBrowser { browser: String },
+    SetSmoothScrolling { enabled: bool },
+    SetEagerRestoreCount { count: usize },
+    SetFreezeAfter { seconds: u64 },
+    SetDiscardAfter { seconds: u64 },
+    SetMemoryBudget { megabytes: u64 },
+}
+
+impl Record for Settings {
+    type Mutation = SettingsMutation;
+
+    fn apply(&mut self, mutation: &SettingsMutation) {
+        match mutation {
+            SettingsMutation::SetPreferredBrowser { browser } => self.preferred_browser = browser.clone(),
+            SettingsMutation::SetSmoothScrolling { enabled } => self.smooth_scrolling = *enabled,
+            SettingsMutation::SetEagerRestoreCount { count } => self.eager_restore_count = *count,
+            SettingsMutation::SetFreezeAfter { seconds } => self.freeze_after = *seconds,
+            SettingsMutation::SetDiscardAfter { seconds } => self.discard_after = *seconds,
+            SettingsMutation::SetMemoryBudget { megabytes } => self.memory_budget = *megabytes,
+        }
+    }
+}
+
+// The tabs that were open when Ibrowse was last closed, stored in session.json
+#[derive(Serialize, Deserialize, Default, Clone)]
+#[serde(default)]
+pub struct Session {
+    pub tabs: Vec<SessionTab>,
+}
+
+// A saved tab, enough to show it in the tab bar without loading the page
+#[derive(Serialize, Deserialize, Default, Clone)]
+#[serde(from = "SavedTab")]
+pub struct SessionTab {
+    pub url: String,
+    pub title: String,
+    pub last_active: f64,
+}
+
+// Sessions written before titles were saved only hold the url
+#[derive(Deserialize)]
+#[serde(untagged)]
+enum SavedTab {
+    Url(String),
+    Tab {
+        url: String,
+        #[serde(default)]
+        title: String,
+        #[serde(default)]
+        last_active: f64,
+    },
+}
+
+impl From<SavedTab> for SessionTab {
+    fn from(saved: SavedTab) -> Self {
+        match saved {
+            SavedTab::Url(url) => SessionTab { url, ..Default::default() },
+            SavedTab::Tab { url, title, last_active } => SessionTab { url, title, last_active },
+        }
+    }
+}
+
+#[derive(Serialize, Deserialize)]
+#[serde(tag = "op", rename_all = "snake_case")]
+pub enum SessionMutation {
+    SetTabs { tabs: Vec<SessionTab> },
+}
+
+impl Record for Session {
+    type Mutation = SessionMutation;
+
+    fn apply(&mut self, mutation: &SessionMutation) {
+        match mutation {
+            SessionMutation::SetTabs { tabs } => self.tabs = tabs.clone(),
+        }
+    }
+}
+
+pub static SETTINGS: LazyLock<Store<Settings>> = LazyLock::new(|| Store::new("settings"));
+pub static SESSION: LazyLock<Store<Session>> = LazyLock::new(|| Store::new("session"));
+
+// Set the previous tabs array to a Python list ('[(url, title, last_active)]')
 #[pyfunction]
-pub fn set_previous_tabs(tabs: Vec<String>) -> PyResult<()> {
-    let mut config = file_ops::load_config();
-    config.previous_tabs = tabs;
+pub fn set_previous_tabs(py: Python<'_>, tabs: Vec<(String, String, f64)>) -> PyResult<()> {
+    let tabs = tabs
+        .into_iter()
+        .map(|(url, title, last_active)| SessionTab { url, title, last_active })
+        .collect();
+
+    py.allow_threads(|| SESSION.apply(SessionMutation::SetTabs { tabs }));
 
-    file_ops::save_config(&config);
     Ok(())
 }
 
 // Set the preferred browser to a Python string ('[browser_name]')
 #[pyfunction]
-pub fn set_preferred_browser(browser: String) -> PyResult<()> {
-    let mut config = file_ops::load_config();
-    config.preferred_browser = browser;
+pub fn set_preferred_browser(py: Python<'_>, browser: String) -> PyResult<()> {
+    py.allow_threads(|| SETTINGS.apply(SettingsMutation::SetPreferredBrowser { browser }));
 
-    file_ops::save_config(&config);
     Ok(())
 }
 
 // Set smooth scrolling enabled
 #[pyfunction]
-pub fn set_smooth_scrolling(enabled: bool) -> PyResult<()> {
-    let mut config = file_ops::load_config();
-    config.smooth_scrolling = enabled;
+pub fn set_smooth_scrolling(py: Python<'_>, enabled: bool) -> PyResult<()> {
+    py.allow_threads(|| SETTINGS.apply(SettingsMutation::SetSmoothScrolling { enabled }));
+
+    Ok(())
+}
+
+// Set how many of the most recently used tabs are loaded straight away on restore
+#[pyfunction]
+pub fn set_eager_restore_count(py: Python<'_>, count: usize) -> PyResult<()> {
+    py.allow_threads(|| SETTINGS.apply(SettingsMutation::SetEagerRestoreCount { count }));
+
+    Ok(())
+}
+
+// Set how many seconds a background tab stays idle before it is frozen (0 never freezes)
+#[pyfunction]
+pub fn set_freeze_after(py: Python<'_>, seconds: u64) -> PyResult<()> {
+    py.allow_threads(|| SETTINGS.apply(SettingsMutation::SetFreezeAfter { seconds }));
 
-    file_ops::save_config(&config);
     Ok(())
-}
\ No newline at end of file
+}
+
+// Set how many seconds a background tab stays idle before it is discarded (0 never discards)
+#[pyfunction]
+pub fn set_discard_after(py: Python<'_>, seconds: u64) -> PyResult<()> {
+    py.allow_threads(|| SETTINGS.apply(SettingsMutation::SetDiscardAfter { seconds }));
+
+    Ok(())
+}
+
+// Set how many megabytes all renderer processes together may use before tabs get discarded (0 has no limit)
+#[pyfunction]
+pub fn set_memory_budget(py: Python<'_>, megabytes: u64) -> PyResult<()> {
+    py.allow_threads(|| SETTINGS.apply(SettingsMutation::SetMemoryBudget { megabytes }));
+
+    Ok(())
+}
@@ -0,0 +1,64 @@
+"""
+Stress test for the config stores: several Ibrowse processes insert passwords at the same
+time and every single record has to survive.
+
+Usage: python utils/config_stress.py [processes] [records per process]
+
+The stores are pointed at a throwaway directory through XDG_CONFIG_HOME, which only the
+Linux build honours, so this refuses to run anywhere else.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+
+
+def insert(worker: int, records: int):
+    import ibrowse
+
+    for i in range(records):
+        ibrowse.add_password(f'https://worker{worker}.example/{i}', f'user{i}', f'password{i}')
+
+        if i % 10 == 0:
+            ibrowse.flush()
+
+    ibrowse.flush()
+
+
+def main():
+    if not sys.platform.startswith('linux'):
+        sys.exit('config_stress.py only runs on Linux')
+
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    records = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as config_home:
+        os.environ['XDG_CONFIG_HOME'] = config_home
+
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=insert, args=(worker, records)) for worker in range(processes)]
+
+        for worker in workers:
+            worker.start()
+
+        for worker in workers:
+            worker.join()
+
+        import ibrowse
+
+        passwords = ibrowse.passwords()
+        missing = [
+            f'https://worker{worker}.example/{i}'
+            for worker in range(processes)
+            for i in range(records)
+            if f'https://worker{worker}.example/{i}' not in passwords
+        ]
+
+        print(f'{len(passwords)} records stored, {len(missing)} missing')
+
+        if missing:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Download check: serves a generated file from a local HTTP server and fetches it with the download
+manager four times: over one connection from a server without range support, over several
+connections, paused half way then resumed, and from a server that only answers the first range.
+Each copy is compared byte for byte and the number of ranged responses is checked, and the
+memory of the process is sampled throughout. Exits 1 if a copy differs, a ranged download did
+not use several connections, or memory grew by more than the limit.
+
+Usage: python utils/download_check.py [size in MiB, 2048 by default]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import ibrowse
+from PyQt6.QtWidgets import QApplication
+from src.gui import downloads
+
+
+# Served over and over, its odd length makes a byte written at the wrong offset show up
+BLOCK = random.Random(0).randbytes(1_000_003)
+# Growth of the resident set over the whole check that counts as holding a download in memory
+MEMORY_LIMIT = 64 * 2 ** 20
+
+
+def content(start: int, end: int) -> bytes:
+    offset = start % len(BLOCK)
+    data = BLOCK[offset:] + BLOCK * ((end - start) // len(BLOCK) + 1)
+
+    return data[:end - start]
+
+
+class Handler(BaseHTTPRequestHandler):
+    size = 0
+    # Number of 206 responses sent
+    partial = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        start, end = 0, self.size
+        ranged = self.path in ('/ranged', '/first-range') and self.headers.get('Range', '').startswith('bytes=')
+
+        # '/first-range' accepts the probe for the whole file and ignores every other range
+        if ranged and self.path == '/first-range':
+            ranged = self.headers['Range'] == 'bytes=0-'
+
+        if ranged:
+            with Handler.lock:
+                Handler.partial += 1
+
+            first, last = self.headers['Range'][len('bytes='):].split('-')
+            start, end = int(first), int(last) + 1 if last else self.size
+
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{self.size}')
+
+        else:
+            self.send_response(200)
+
+        self.send_header('Content-Length', str(end - start))
+        self.end_headers()
+
+        try:
+            for position in range(start, end, len(BLOCK)):
+                self.wfile.write(content(position, min(position + len(BLOCK), end)))
+
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def wait(app: QApplication, download, states: tuple):
+    while download.state() not in states:
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def matches(path: str, size: int) -> bool:
+    if os.path.getsize(path) != size:
+        return False
+
+    with open(path, 'rb') as file:
+        for position in range(0, size, len(BLOCK)):
+            if file.read(len(BLOCK)) != content(position, min(position + len(BLOCK), size)):
+                return False
+
+    return True
+
+
+def main():
+    size = int(sys.argv[1]) * 2 ** 20 if len(sys.argv) > 1 else 2048 * 2 ** 20
+
+    app = QApplication(sys.argv)
+    manager = downloads.manager()
+
+    Handler.size = size
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    pid = os.getpid()
+    baseline = ibrowse.process_memory([pid]).get(pid, 0)
+    peak = [baseline]
+    sampling = threading.Event()
+
+    def sample():
+        while not sampling.wait(0.1):
+            peak[0] = max(peak[0], ibrowse.process_memory([pid]).get(pid, 0))
+
+    threading.Thread(target=sample, daemon=True).start()
+    failed = False
+
+    # Small test files are still split, so the parallel path is always exercised
+    downloads.PARALLEL_THRESHOLD = min(downloads.PARALLEL_THRESHOLD, size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # (label, path, pause half way, least number of ranged responses expected)
+        for label, path, pause, partial in [('one connection', '/plain', False, 0),
+                                            (f'{downloads.CONNECTIONS} connections', '/ranged', False,
+                                             downloads.CONNECTIONS),
+                                            ('paused and resumed', '/ranged', True, downloads.CONNECTIONS + 1),
+                                            ('ranges ignored', '/first-range', False, 1)]:
+            target = os.path.join(directory, label.replace(' ', '_'))
+            Handler.partial = 0
+            start = time.perf_counter()
+            download = manager.download(base + path, target)
+
+            if pause:
+                while download.received() < size // 2 and download.state() == downloads.ACTIVE:
+                    app.processEvents()
+                    time.sleep(0.01)
+
+                download.pause()
+                wait(app, download, (downloads.PAUSED,))
+
+                # The transfer threads are done with the file once the paused state is saved
+                while not os.path.exists(download.state_path):
+                    time.sleep(0.01)
+
+                download.resume()
+
+            wait(app, download, (downloads.FINISHED, downloads.FAILED))
+            elapsed = time.perf_counter() - start
+
+            ok = download.state() == downloads.FINISHED and matches(target, size)
+            error = download.error
+
+            if ok and Handler.partial < partial:
+                ok = False
+                error = f'only {Handler.partial} ranged responses, expected at least {partial}'
+
+            failed = failed or not ok
+            print(f'{label:<20}{size / 2 ** 20 / elapsed:>8.0f} MiB/s  {Handler.partial:>3} ranged  '
+                  f'{"ok" if ok else "FAILED " + error}')
+
+            if os.path.exists(target):
+                os.remove(target)
+
+    sampling.set()
+    server.shutdown()
+
+    growth = peak[0] - baseline
+    print(f'memory grew by {growth / 2 ** 20:.1f} MiB at most')
+
+    if failed or growth > MEMORY_LIMIT:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Checks that the icon registry parses every SVG exactly once, no matter how many widgets use it
+or at how many device pixel ratios it is drawn.
+
+Usage: python utils/icon_cache_check.py [widgets]
+
+Run it from the repository root so the resources directory resolves. It uses the offscreen
+platform, so no display is needed.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import QSize
+from PyQt6.QtWidgets import QApplication, QPushButton
+from src.gui.icons import icon, svg_parses
+
+
+FILES = [
+    'resources/icons/ui/back_icon.svg',
+    'resources/icons/ui/forward_icon.svg',
+    'resources/icons/ui/reload_icon.svg',
+    'resources/icons/ui/menu_access_icon.svg',
+    'resources/icons/ui/close_icon.svg',
+    'resources/icons/ui/locked_icon.svg'
+]
+
+
+def main():
+    widgets = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app = QApplication(sys.argv)
+
+    buttons = []
+
+    for i in range(widgets):
+        button = QPushButton(icon(FILES[i % len(FILES)]), '')
+        button.setIconSize(QSize(20, 20))
+        buttons.append(button)
+
+    for file_name in FILES:
+        for ratio in (1.0, 1.25, 2.0):
+            icon(file_name).pixmap(QSize(20, 20), ratio)
+
+    for button in buttons:
+        button.grab()
+
+    print(f'{widgets} widgets, {len(FILES)} icons, {svg_parses()} SVG parses')
+
+    if svg_parses() != len(FILES):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
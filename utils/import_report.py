@@ -0,0 +1,55 @@
+"""
+Import-time report for the startup path: imports main.py under `python -X importtime` and lists the
+slowest imports. Exits 1 if a module that should only load on first use is imported at startup.
+
+Usage: python utils/import_report.py [top]
+"""
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Loaded on first use (printing, downloads, dialogs, importing passwords), never while starting up
+DEFERRED = ['PyQt6.QtPrintSupport', 'src.gui.dialogs', 'src.gui.downloads', 'urllib.request', 'ssl', 'csv']
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+
+    # Lines look like 'import time:       self [us] |  cumulative | imported package'
+    imports = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    modules = {name for name, _, _ in imports}
+    total = sum(self_us for _, self_us, _ in imports)
+
+    print(f'{len(imports)} modules imported in {total / 1000:.1f} ms')
+
+    for name, _, cumulative_us in sorted(imports, key=lambda item: item[2], reverse=True)[:top]:
+        print(f'  {cumulative_us / 1000:>8.1f} ms  {name}')
+
+    loaded = [name for name in DEFERRED if name in modules]
+
+    for name in loaded:
+        print(f'{name} is imported at startup')
+
+    if loaded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
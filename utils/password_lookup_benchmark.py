@@ -0,0 +1,127 @@
+"""
+Password lookup benchmark: saves 50,000 generated credentials in a throwaway config directory and
+times ibrowse.lookup_credentials against the scan the paste actions used to do (fetching every
+password and normalizing each url). Checks both agree wherever the page url matches a saved one,
+and that CASES resolve as expected: nothing leaks between sites on a shared hosting domain, and
+autofill ('same_origin') keeps to the saved scheme, host and port.
+
+Usage: python utils/password_lookup_benchmark.py [count] [lookups]
+
+The config directory is redirected through XDG_CONFIG_HOME, which only the Linux build honours,
+so this refuses to run anywhere else.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+# Credentials saved next to the generated ones, as (url, username)
+SAVED = [
+    ('https://a.github.io/login', 'github-a'),
+    ('https://app.herokuapp.com/', 'heroku-app'),
+    ('https://me.blogspot.com/', 'blogspot-me'),
+    ('https://example.com/accounts/login/', 'example'),
+    ('example.org', 'example-org'),
+    ('http://localhost:8080/admin', 'localhost')
+]
+
+# Page urls with the 'same_origin' flag and the username expected back
+CASES = [
+    ('https://a.github.io/login', True, 'github-a'),
+    ('https://a.github.io/other', True, 'github-a'),
+    ('https://b.github.io/login', False, None),
+    ('http://a.github.io/login', True, None),
+    ('http://a.github.io/login', False, 'github-a'),
+    ('https://a.github.io:8443/login', True, None),
+    ('https://other.herokuapp.com/', False, None),
+    ('https://you.blogspot.com/', False, None),
+    ('https://example.com/accounts/login/step2', True, 'example'),
+    ('https://EXAMPLE.com:443/accounts', True, 'example'),
+    ('https://www.example.com/', False, None),
+    ('https://example.org/signin', True, 'example-org'),
+    ('http://localhost:8080/admin/users', True, 'localhost'),
+    ('http://localhost:9090/admin', True, None)
+]
+
+
+def normalize_url(url: str) -> str:
+    # What WebEngineView.normalizeUrl did before the index
+    parsed = urlparse(url if '://' in url else 'https://' + url)
+
+    return f'{parsed.netloc.lower()}{parsed.path.rstrip("/")}'
+
+
+def scan(passwords_fn, url: str):
+    for saved, value in passwords_fn().items():
+        if normalize_url(saved) == normalize_url(url):
+            return tuple(value)
+
+    return None
+
+
+def timed(fn, urls: list[str]) -> tuple[list, list[float]]:
+    results, times = [], []
+
+    for url in urls:
+        start = time.perf_counter()
+        results.append(fn(url))
+        times.append((time.perf_counter() - start) * 1e6)
+
+    return results, times
+
+
+def report(label: str, times: list[float]):
+    times = sorted(times)
+    print(f'{label:<22}median {statistics.median(times):>10.1f} us   p99 {times[int(len(times) * 0.99)]:>10.1f} us')
+
+
+def main():
+    if not sys.platform.startswith('linux'):
+        sys.exit('password_lookup_benchmark.py only runs on Linux')
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['XDG_CONFIG_HOME'] = home
+
+        import ibrowse
+
+        rng = random.Random(0)
+        credentials = [(f'https://{"www." if i % 3 else ""}site{i}.example.com/login/{i % 7}',
+                        f'user{i}', f'password{i}') for i in range(count)]
+
+        start = time.perf_counter()
+        ibrowse.add_passwords(credentials + [(url, username, 'password') for url, username in SAVED])
+        ibrowse.flush()
+        print(f'saved {count} credentials in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+        pages = [url for url, _, _ in rng.sample(credentials, lookups)]
+        deeper = [url + '/step/2?next=1' for url in pages]
+
+        indexed, indexed_times = timed(ibrowse.lookup_credentials, pages)
+        _, deeper_times = timed(ibrowse.lookup_credentials, deeper)
+        # The scan is far slower, a tenth of the lookups is plenty to time it
+        scanned, scan_times = timed(lambda url: scan(ibrowse.passwords, url), pages[:max(1, lookups // 10)])
+
+        report('lookup_credentials', indexed_times)
+        report('  under a saved path', deeper_times)
+        report('full scan', scan_times)
+
+        if indexed[:len(scanned)] != scanned:
+            sys.exit('lookup_credentials disagrees with the full scan')
+
+        for url, same_origin, expected in CASES:
+            found = ibrowse.lookup_credentials(url, same_origin=same_origin)
+
+            if (found[0] if found else None) != expected:
+                sys.exit(f'lookup_credentials({url!r}, same_origin={same_origin}) gave {found}, expected {expected}')
+
+        print(f'{len(CASES)} lookup cases passed')
+
+
+if __name__ == '__main__':
+    main()
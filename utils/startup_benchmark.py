@@ -0,0 +1,135 @@
+"""
+Startup benchmark: launches Ibrowse with startup profiling on, opening pages from a local HTTP
+server under the offscreen platform, and reports the median time to each startup milestone.
+
+Usage: python utils/startup_benchmark.py [--runs N] [--tabs N] [--save FILE] [--compare FILE]
+
+Cold runs get fresh config and cache directories; warm runs reuse the directories of a previous
+run. --save writes the medians to FILE, --compare checks them against a saved FILE and exits 1
+when startup got more than 20% slower. The directories are redirected through XDG_CONFIG_HOME
+and XDG_CACHE_HOME, which only the Linux build honours, so this refuses to run anywhere else.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MILESTONES = ['import', 'QApplication', 'stylesheet', 'WebEngineProfile', 'window', 'Tab', 'first paint',
+              'startup finished']
+# Slowdown over the saved medians that counts as a regression
+REGRESSION_THRESHOLD = 1.2
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f'<html><head><title>{self.path}</title></head><body><h1>{self.path}</h1></body></html>'.encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(urls: list[str], home: str) -> dict:
+    trace = os.path.join(home, 'trace.json')
+    env = dict(os.environ,
+               QT_QPA_PLATFORM='offscreen',
+               XDG_CONFIG_HOME=os.path.join(home, 'config'),
+               XDG_CACHE_HOME=os.path.join(home, 'cache'),
+               IBROWSE_PROFILE_STARTUP='1',
+               IBROWSE_PROFILE_EXIT='1',
+               IBROWSE_PROFILE_OUTPUT=trace)
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'main.py', '--new-instance', *urls], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wall = (time.perf_counter() - start) * 1000
+
+    with open(trace) as file:
+        events = json.load(file)['traceEvents']
+
+    # Milliseconds from the start of the trace to the end of each milestone, the last one for repeated spans
+    result = {'wall': wall}
+
+    for event in events:
+        result[event['name']] = (event['ts'] + event.get('dur', 0)) / 1000
+
+    return result
+
+
+def medians(results: list[dict]) -> dict:
+    return {name: statistics.median(result[name] for result in results)
+            for name in ['wall'] + MILESTONES if all(name in result for result in results)}
+
+
+def report(label: str, values: dict):
+    print(label)
+
+    for name, value in values.items():
+        print(f'  {name:<18}{value:>10.1f} ms')
+
+
+def main():
+    if not sys.platform.startswith('linux'):
+        sys.exit('startup_benchmark.py only runs on Linux')
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tabs', type=int, default=5)
+    parser.add_argument('--save')
+    parser.add_argument('--compare')
+    options = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f'http://127.0.0.1:{server.server_port}/{i}' for i in range(options.tabs)]
+
+    cold = []
+
+    for _ in range(options.runs):
+        with tempfile.TemporaryDirectory() as home:
+            cold.append(run(urls, home))
+
+    with tempfile.TemporaryDirectory() as home:
+        run(urls, home)
+        warm = [run(urls, home) for _ in range(options.runs)]
+
+    server.shutdown()
+
+    results = {'cold': medians(cold), 'warm': medians(warm)}
+    report(f'cold start, median of {options.runs}', results['cold'])
+    report(f'warm start, median of {options.runs}', results['warm'])
+
+    if options.save:
+        with open(options.save, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+
+        regressed = [f'{kind} {name}: {baseline[kind][name]:.1f} -> {value:.1f} ms'
+                     for kind in results for name, value in results[kind].items()
+                     if name in baseline.get(kind, {}) and value > baseline[kind][name] * REGRESSION_THRESHOLD]
+
+        for line in regressed:
+            print(f'regression: {line}')
+
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Leak check for tab teardown: opens and closes tabs against a local HTTP server and checks that
+the pages, their renderer processes and the process RSS go back to where they started.
+
+Usage: python utils/tab_leak_check.py [tabs]
+
+Run it from the repository root so the resources directory resolves. It uses the offscreen
+platform and an off-the-record profile, so no display is needed and no user data is touched.
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import ibrowse
+from PyQt6.QtCore import QEvent, QEventLoop, QUrl
+from PyQt6.QtWebEngineCore import QWebEnginePage, QWebEngineProfile
+from PyQt6.QtWidgets import QApplication
+from main import Ibrowse
+
+
+# RSS may grow by this much over the baseline before it counts as a leak
+RSS_TOLERANCE = 1.25
+# Pages load concurrently in batches of this many tabs
+BATCH_SIZE = 20
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f'<html><head><title>{self.path}</title></head><body>{"x" * 50000}</body></html>'.encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def settle(app: QApplication, seconds: float):
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 50)
+        # Deferred deletes only run from the event loop, not from processEvents
+        app.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+
+
+def rss() -> int:
+    return ibrowse.process_memory([os.getpid()]).get(os.getpid(), 0)
+
+
+def live_pages(window: Ibrowse) -> int:
+    return len(window.findChildren(QWebEnginePage))
+
+
+def main():
+    tabs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    app = QApplication(sys.argv)
+    profile = QWebEngineProfile(app)
+    window = Ibrowse(profile)
+    window.show()
+    window.loadDefaultTab()
+    settle(app, 2)
+
+    # One warm-up round so lazily created Qt and Chromium state is not counted as a leak
+    window.tab_view.newTabFromUrl(QUrl(f'{base}/warmup'))
+    settle(app, 2)
+    window.tab_view.closeTab(window.tab_view.count() - 1)
+    settle(app, 2)
+
+    baseline_pages = live_pages(window)
+    baseline_rss = rss()
+    renderers = set()
+
+    for start in range(0, tabs, BATCH_SIZE):
+        for i in range(start, min(start + BATCH_SIZE, tabs)):
+            window.tab_view.newTabFromUrl(QUrl(f'{base}/{i}'))
+
+        settle(app, 1)
+
+        for i in range(1, window.tab_view.count()):
+            renderers.add(window.tab_view.widget(i).page().renderProcessPid())
+
+        while window.tab_view.count() > 1:
+            window.tab_view.closeTab(window.tab_view.count() - 1)
+
+        settle(app, 0.5)
+
+    settle(app, 3)
+
+    pages = live_pages(window)
+    final_rss = rss()
+    renderers.discard(0)
+    surviving = ibrowse.process_memory(list(renderers))
+
+    print(f'{tabs} tabs opened and closed')
+    print(f'pages: {baseline_pages} -> {pages}')
+    print(f'rss: {baseline_rss // 2 ** 20} MiB -> {final_rss // 2 ** 20} MiB')
+    print(f'renderers still running: {len(surviving)} of {len(renderers)} seen')
+
+    server.shutdown()
+
+    # Chromium may keep one spare renderer around, anything beyond that outlived its tabs
+    if pages > baseline_pages or final_rss > baseline_rss * RSS_TOLERANCE or len(surviving) > 1:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()